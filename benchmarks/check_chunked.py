@@ -0,0 +1,77 @@
+'''
+Vérifie que df_clean_create_chunked (hors mémoire, par blocs) donne exactement le
+même résultat que df_clean_create (tout en mémoire) : mêmes lignes, mêmes colonnes,
+mêmes valeurs au bit près (assert_frame_equal avec check_exact=True).
+Vérifie aussi que GoalRatioEncoder.partial_fit bloc par bloc égale un fit en une fois.
+
+Usage : python benchmarks/check_chunked.py [--rows 100000] [--chunksize 7777]
+Code de sortie 1 si une différence est trouvée.
+'''
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_projects  # noqa: E402
+from scripts.feature_engineering import GoalRatioEncoder  # noqa: E402
+from scripts.preprocessing import _filter_projects, df_clean_create, df_clean_create_chunked  # noqa: E402
+
+
+def check(rows, chunksize, seed=0):
+    '''
+    Renvoie la liste des différences trouvées (vide si tout est identique).
+    '''
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="ks_chunked_") as workdir:
+        raw_path = os.path.join(workdir, "raw.csv")
+        out_path = os.path.join(workdir, "features.parquet")
+        make_projects(rows, seed=seed).to_csv(raw_path, index=False)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = df_clean_create(pd.read_csv(raw_path)).reset_index(drop=True)
+            means = df_clean_create_chunked(raw_path, out_path, chunksize=chunksize)
+        result = pd.read_parquet(out_path)
+
+        try:
+            pd.testing.assert_frame_equal(result, expected, check_exact=True)
+        except AssertionError as e:
+            failures.append(f"df_clean_create_chunked != df_clean_create : {e}")
+
+        df = _filter_projects(pd.read_csv(raw_path))
+        fitted = GoalRatioEncoder().fit(df)
+        if means != (fitted.mean_goal_by_cat_, fitted.mean_goal_by_country_):
+            failures.append("moyennes par blocs != moyennes de GoalRatioEncoder.fit")
+
+        updated = GoalRatioEncoder()
+        for start in range(0, len(df), chunksize):
+            updated.partial_fit(df.iloc[start:start + chunksize])
+        if (updated.mean_goal_by_cat_, updated.mean_goal_by_country_) != (
+                fitted.mean_goal_by_cat_, fitted.mean_goal_by_country_):
+            failures.append("GoalRatioEncoder.partial_fit par blocs != fit en une fois")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--chunksize", type=int, default=7_777)
+    args = parser.parse_args()
+
+    failures = check(args.rows, args.chunksize)
+    for failure in failures:
+        print(f"ÉCHEC : {failure}")
+    if not failures:
+        print(f"OK : {args.rows} lignes, blocs de {args.chunksize}, résultats identiques au bit près")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+'''
+Budget de temps d'import du chemin d'inférence (python -X importtime).
+
+Usage : python benchmarks/import_budget.py [--budget-ms 700] [--runs 5]
+Renvoie un code de sortie 1 si le budget est dépassé ou si un module lourd
+(sklearn, xgboost, matplotlib, seaborn, nltk) est importé par scripts.predict.
+'''
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULE = "scripts.predict"
+IMPORT_BUDGET_MS = 700
+FORBIDDEN = ["sklearn", "xgboost", "matplotlib", "seaborn", "nltk", "scipy", "joblib", "selenium"]
+
+
+def import_time_ms(module):
+    '''
+    Temps cumulé d'import de module (ms) dans un interpréteur neuf.
+    '''
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    for line in out.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|\s*(\S+)$", line)
+        if m and m.group(2) == module:
+            return int(m.group(1)) / 1000
+    raise RuntimeError(f"{module} absent de la sortie de -X importtime")
+
+
+def heavy_modules(module):
+    '''
+    Modules lourds chargés par l'import de module.
+    '''
+    code = (f"import sys, {module}; "
+            f"print(' '.join(m for m in {FORBIDDEN!r} if m in sys.modules))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stdout
+    return out.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Le meilleur des runs : le moins bruité par la machine
+    times = [import_time_ms(MODULE) for _ in range(args.runs)]
+    best = min(times)
+    heavy = heavy_modules(MODULE)
+
+    print(f"import {MODULE} : {best:.0f} ms (budget {args.budget_ms:.0f} ms, "
+          f"runs : {', '.join(f'{t:.0f}' for t in times)})")
+    if heavy:
+        print(f"Modules lourds importés : {', '.join(heavy)}")
+
+    if best > args.budget_ms or heavy:
+        print("Budget d'import dépassé")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+'''
+Benchmarks des chemins chauds : nettoyage, commentaires, entraînement et prédiction,
+sur des données synthétiques au format Kickstarter à plusieurs échelles.
+
+Usage :
+    python benchmarks/run.py --scales 10000 100000 1000000 --out bench.json
+    python benchmarks/run.py --scales 10000 --only clean predict_single predict_batch
+    python benchmarks/run.py --scales 100000 --only train train_nocache
+    python benchmarks/run.py --compare old.json new.json
+
+Chaque résultat contient le temps (wall) et le pic de mémoire au-dessus de la
+mémoire de départ (RSS via psutil, sinon tracemalloc).
+'''
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import make_comments, make_projects  # noqa: E402
+
+
+DEFAULT_SCALES = [10_000, 100_000, 1_000_000]
+BENCHMARKS = ["clean", "comments", "preprocess", "train", "train_nocache", "predict_single", "predict_batch"]
+MB = 1024 * 1024
+
+
+###---------------Mesures---------------###
+
+class PeakMemory:
+    '''
+    Pic de mémoire pendant un bloc, au-dessus de la mémoire au début du bloc.
+    RSS échantillonnée par un thread (psutil) ; tracemalloc si psutil est absent.
+    '''
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak_mb = None
+
+    def __enter__(self):
+        try:
+            import psutil
+        except ImportError:
+            import tracemalloc
+            self._tracemalloc = tracemalloc
+            tracemalloc.start()
+            return self
+
+        self._tracemalloc = None
+        self._process = psutil.Process()
+        self._baseline = self._peak = self._process.memory_info().rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self._peak = max(self._peak, self._process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __exit__(self, *exc):
+        if self._tracemalloc is not None:
+            _, peak = self._tracemalloc.get_traced_memory()
+            self._tracemalloc.stop()
+            self.peak_mb = round(peak / MB, 1)
+        else:
+            self._stop.set()
+            self._thread.join()
+            self._peak = max(self._peak, self._process.memory_info().rss)
+            self.peak_mb = round((self._peak - self._baseline) / MB, 1)
+        return False
+
+
+def measure(fn, quiet=True):
+    '''
+    Exécute fn() et renvoie (résultat, temps en s, pic mémoire en Mo).
+    '''
+    out = io.StringIO() if quiet else sys.stdout
+    with PeakMemory() as mem, contextlib.redirect_stdout(out):
+        start = time.perf_counter()
+        result = fn()
+        wall = time.perf_counter() - start
+    return result, wall, mem.peak_mb
+
+
+###---------------Benchmarks---------------###
+
+def run_scale(scale, only, workdir, seed=0):
+    '''
+    Tous les benchmarks demandés pour une échelle donnée (nombre de projets).
+    '''
+    from scripts.model import model_training_saving
+    from scripts.predict import predict_many, predict_project_success
+    from scripts.preprocessing import df_clean_create, df_create_state_comments, preprocess
+    from scripts.registry import REGISTRY_DIR, ModelRegistry
+
+    raw = make_projects(scale, seed=seed)
+    projects_csv = os.path.join(workdir, "projects.csv")
+    comments_csv = os.path.join(workdir, "comments.csv")
+    raw.to_csv(projects_csv, index=False)
+    make_comments(raw["ID"], seed=seed).to_csv(comments_csv, index=False)
+
+    results = []
+    state = {}
+
+    def record(name, fn, **extra):
+        try:
+            result, wall, peak = measure(fn)
+        except Exception as e:
+            first_line = next((l.strip() for l in str(e).splitlines() if any(c.isalpha() for c in l)), "")
+            message = f"{type(e).__name__}: {first_line}"
+            print(f"  {name:<15} ÉCHEC : {message}")
+            results.append({"name": name, "scale": scale, "error": message})
+            return None
+        row = {"name": name, "scale": scale, "wall_s": round(wall, 4), "peak_mem_mb": peak}
+        row.update({k: v(result, wall) if callable(v) else v for k, v in extra.items()})
+        results.append(row)
+        print(f"  {name:<15} {wall:9.3f} s  {peak if peak is not None else '-':>8} Mo")
+        return result
+
+    need_clean = {"clean", "train", "train_nocache", "predict_single", "predict_batch"} & set(only)
+    if need_clean:
+        state["clean"] = record("clean", lambda: df_clean_create(raw.copy()),
+                                rows_per_s=lambda r, w: round(scale / w, 1))
+
+    if "comments" in only or "preprocess" in only:
+        state["comments"] = record("comments", lambda: df_create_state_comments(comments_csv, projects_csv),
+                                   rows=lambda r, w: len(r))
+
+    if "preprocess" in only and state.get("comments") is not None:
+        record("preprocess", lambda: preprocess(state["comments"].copy()),
+               rows=lambda r, w: len(r))
+
+    if {"train", "predict_single", "predict_batch"} & set(only) and state.get("clean") is not None:
+        # Recherche réduite : 2 candidats x 2 folds ; le modèle devient la version live du registre
+        record("train", lambda: model_training_saving(state["clean"], n_iter=2, cv=2, promote=True,
+                                                      registry_dir=os.path.join(workdir, REGISTRY_DIR)))
+
+    if "train_nocache" in only and state.get("clean") is not None:
+        # Même recherche, preprocessing réajusté à chaque fit (temps gagné par le cache des folds)
+        record("train_nocache", lambda: model_training_saving(
+            state["clean"], n_iter=2, cv=2, cache_preprocessing=False,
+            registry_dir=os.path.join(workdir, "save_pkl", "registry_nocache")))
+
+    has_model = ModelRegistry(os.path.join(workdir, REGISTRY_DIR)).live() is not None
+    if "predict_single" in only and has_model:
+        user_input = {"name": "Mon super projet", "main_category": "Games", "country": "US",
+                      "launched": "01/01/2024", "deadline": "01/02/2024", "usd_goal_real": 5000.0}
+        predict_project_success(user_input, use_cache=False)   # chargement du modèle hors mesure
+
+        def single_latency(n=500):
+            latencies = []
+            for i in range(n):
+                start = time.perf_counter()
+                predict_project_success(dict(user_input, usd_goal_real=1000.0 + i), use_cache=False)
+                latencies.append(time.perf_counter() - start)
+            return np.array(latencies)
+
+        record("predict_single", single_latency,
+               p50_us=lambda r, w: round(float(np.percentile(r, 50)) * 1e6, 1),
+               p99_us=lambda r, w: round(float(np.percentile(r, 99)) * 1e6, 1))
+
+    if "predict_batch" in only and has_model:
+        batch = raw.drop(columns=["usd_pledged_real"])
+        record("predict_batch", lambda: predict_many(batch),
+               rows_per_s=lambda r, w: round(scale / w, 1))
+
+    return results
+
+
+###---------------Comparaison---------------###
+
+def compare(old_path, new_path):
+    '''
+    Affiche le rapport des temps et de la mémoire entre deux fichiers de résultats.
+    '''
+    with open(old_path) as f:
+        old = {(r["name"], r["scale"]): r for r in json.load(f)["results"] if "wall_s" in r}
+    with open(new_path) as f:
+        new = {(r["name"], r["scale"]): r for r in json.load(f)["results"] if "wall_s" in r}
+
+    print(f"{'benchmark':<15} {'scale':>9} {'old s':>9} {'new s':>9} {'speedup':>8} {'old Mo':>8} {'new Mo':>8}")
+    for key in sorted(old.keys() & new.keys(), key=lambda k: (k[1], BENCHMARKS.index(k[0]))):
+        o, n = old[key], new[key]
+        speedup = o["wall_s"] / n["wall_s"] if n["wall_s"] else float("inf")
+        print(f"{key[0]:<15} {key[1]:>9} {o['wall_s']:>9.3f} {n['wall_s']:>9.3f} {speedup:>7.2f}x "
+              f"{o['peak_mem_mb']:>8} {n['peak_mem_mb']:>8}")
+
+
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    versions = {}
+    for module in ("pandas", "numpy", "sklearn", "xgboost"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks Kickstarter")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    for scale in args.scales:
+        print(f"=== {scale} projets ===")
+        workdir = tempfile.mkdtemp(prefix="ks_bench_")
+        cwd = os.getcwd()
+        try:
+            # Les fonctions lisent / écrivent save_pkl/ en relatif : on travaille dans un dossier jetable
+            os.chdir(workdir)
+            results += run_scale(scale, args.only, workdir, seed=args.seed)
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.out, "w") as f:
+        json.dump({"meta": _metadata(), "results": results}, f, indent=2)
+    print(f"Résultats enregistrés dans {args.out}")
+
+
+if __name__ == "__main__":
+    main()
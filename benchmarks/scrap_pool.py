@@ -0,0 +1,266 @@
+'''
+Scraping sur des pages Kickstarter locales (benchmarks/fixtures, servies par un
+serveur HTTP local) : vérifie les champs extraits et compare un navigateur neuf
+par URL (max_pages=1, l'ancien comportement) au pool de navigateurs réutilisés.
+
+Usage :
+    python benchmarks/scrap_pool.py [--pages 20] [--size 2]     # Chrome / chromedriver (Selenium)
+    python benchmarks/scrap_pool.py --fake                      # sans navigateur (FakeDriver)
+
+--fake remplace Chrome par FakeDriver (factory du pool) : mêmes fixtures, même serveur
+HTTP, même code de scraping ; vérifie aussi le recyclage et le health check du pool.
+Code de sortie 1 si un champ extrait ou une vérification du pool est faux.
+'''
+
+import argparse
+import contextlib
+import functools
+import http.server
+import os
+import urllib.request
+from html.parser import HTMLParser
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scripts.browser_pool import BrowserPool  # noqa: E402
+from scripts.scrap import scrape_kickstarter_metadata  # noqa: E402
+
+
+FIXTURES_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+FIXTURE_PATH = "/projects/maker/solar-lantern/"
+
+EXPECTED = {
+    "title": "Solar Lantern Kit",
+    "main_category": "Technology",
+    "country": "United States",
+    "usd_goal_real": 10000.0,
+    "usd_pledged_real": 12345.0,
+    "deadline": "15-03-2024",
+    "launched": "15-02-2024",
+}
+
+
+###---------------Faux navigateur---------------###
+
+_BLOCK_TAGS = {"div", "p", "nav", "main", "section", "header", "footer", "li", "ul", "br",
+               "h1", "h2", "h3", "h4", "h5", "h6", "body"}
+_VOID_TAGS = {"meta", "link", "br", "img", "input", "hr"}
+
+
+class _Node:
+    def __init__(self, tag, attrs):
+        self.tag = tag
+        self.attrs = dict(attrs)
+        self.children = []
+
+    def find(self, predicate):
+        for child in self.children:
+            if isinstance(child, _Node):
+                if predicate(child):
+                    return child
+                found = child.find(predicate)
+                if found is not None:
+                    return found
+        return None
+
+    def text_content(self):
+        return "".join(c if isinstance(c, str) else c.text_content() for c in self.children)
+
+    def inner_text(self):
+        parts = []
+        for child in self.children:
+            if isinstance(child, str):
+                parts.append(" ".join(child.split()))
+            elif child.tag in _BLOCK_TAGS:
+                parts.append("\n" + child.inner_text() + "\n")
+            elif child.tag not in ("script", "style", "title", "head"):
+                parts.append(child.inner_text())
+        lines = (line.strip() for line in "".join(parts).split("\n"))
+        return "\n".join(line for line in lines if line)
+
+
+class _TreeBuilder(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.root = _Node("document", {})
+        self._stack = [self.root]
+
+    def handle_starttag(self, tag, attrs):
+        node = _Node(tag, attrs)
+        self._stack[-1].children.append(node)
+        if tag not in _VOID_TAGS:
+            self._stack.append(node)
+
+    def handle_endtag(self, tag):
+        for i in range(len(self._stack) - 1, 0, -1):
+            if self._stack[i].tag == tag:
+                del self._stack[i:]
+                break
+
+    def handle_data(self, data):
+        self._stack[-1].children.append(data)
+
+
+class FakeDriver:
+    '''
+    Remplaçant minimal de webdriver.Chrome pour les fixtures : get() télécharge la page
+    (urllib) et execute_script() reproduit seulement les scripts de scrape_kickstarter_metadata
+    (og:title, breadcrumb, data-test-id, innerText) sur l'arbre HTML. Pas de JavaScript.
+    '''
+
+    def __init__(self):
+        self._doc = _Node("document", {})
+        self.alive = True
+
+    def get(self, url):
+        with urllib.request.urlopen(url, timeout=10) as response:
+            builder = _TreeBuilder()
+            builder.feed(response.read().decode("utf-8"))
+        self._doc = builder.root
+
+    @property
+    def title(self):
+        node = self._doc.find(lambda n: n.tag == "title")
+        return node.text_content().strip() if node is not None else ""
+
+    def _test_id(self, value):
+        return self._doc.find(lambda n: n.attrs.get("data-test-id") == value)
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("FakeDriver fermé")
+        script = script.strip()
+        if script == "return 1":
+            return 1
+        if "readyState" in script:
+            return "complete"
+        if "og:title" in script:
+            node = self._doc.find(lambda n: n.tag == "meta" and n.attrs.get("property") == "og:title")
+            return node.attrs.get("content") if node is not None else None
+        if "breadcrumb" in script:
+            nav = self._doc.find(lambda n: n.tag == "nav" and n.attrs.get("aria-label") == "breadcrumb")
+            link = nav.find(lambda n: n.tag == "a" and "/categories/" in n.attrs.get("href", "")) if nav else None
+            return link.text_content().strip() if link is not None else None
+        if "deadline-exists" in script:
+            node = self._test_id("deadline-exists")
+            return node.text_content().strip() if node is not None else None
+        if "hero__stats" in script:
+            head = (self._test_id("hero__stats") or self._test_id("hero__content")
+                    or self._doc.find(lambda n: n.tag == "main") or self._doc.find(lambda n: n.tag == "body"))
+            return head.inner_text() if head is not None else ""
+        if "document.body" in script:
+            body = self._doc.find(lambda n: n.tag == "body")
+            return body.inner_text() if body is not None else ""
+        raise NotImplementedError(f"script non géré par FakeDriver : {script[:60]}")
+
+    def quit(self):
+        self.alive = False
+
+
+def check_pool(url):
+    '''
+    Vérifications du pool avec FakeDriver : recyclage après max_pages, après une erreur,
+    et remplacement d'un navigateur mort au health check. Renvoie la liste des échecs.
+    '''
+    failures = []
+    with BrowserPool(size=1, max_pages=2, factory=FakeDriver) as pool:
+        for _ in range(3):
+            scrape_kickstarter_metadata(url, pool=pool)
+        if pool.stats()["created"] != 2:
+            failures.append(f"max_pages=2, 3 pages : {pool.stats()['created']} navigateurs au lieu de 2")
+
+        try:
+            with pool.borrow():
+                raise ValueError("erreur pendant la page")
+        except ValueError:
+            pass
+        if pool.stats()["open"] != 0:
+            failures.append("session non recyclée après une erreur")
+
+        scrape_kickstarter_metadata(url, pool=pool)
+        pool._idle[0].driver.quit()          # le navigateur meurt pendant qu'il est inactif
+        errors = check(scrape_kickstarter_metadata(url, pool=pool))
+        if pool.stats()["failed_checks"] != 1 or errors:
+            failures.append(f"navigateur mort non remplacé ({pool.stats()}, {errors})")
+    return failures
+
+
+###---------------Serveur de fixtures---------------###
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def serve_fixtures(directory=FIXTURES_DIR):
+    '''
+    Serveur HTTP local (port libre) sur directory ; renvoie l'URL de base.
+    '''
+    handler = functools.partial(_QuietHandler, directory=directory)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def check(result):
+    '''
+    Champs différents de EXPECTED (dict vide si tout est bon).
+    '''
+    return {k: (result.get(k), v) for k, v in EXPECTED.items() if result.get(k) != v}
+
+
+###---------------Comparaison---------------###
+
+def run(url, pages, pool):
+    start = time.perf_counter()
+    errors = {}
+    with pool:
+        for _ in range(pages):
+            errors = check(scrape_kickstarter_metadata(url, pool=pool)) or errors
+        stats = pool.stats()
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 2), "ms_per_page": round(elapsed / pages * 1000, 1),
+            "browsers": stats["created"], "errors": errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scraping sur fixtures locales : pool vs navigateur par URL")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--size", type=int, default=2)
+    parser.add_argument("--max-pages", type=int, default=50)
+    parser.add_argument("--fake", action="store_true", help="FakeDriver au lieu de Chrome (pas de navigateur)")
+    args = parser.parse_args()
+
+    factory = {"factory": FakeDriver} if args.fake else {}
+    failures = []
+    with serve_fixtures() as base:
+        url = base + FIXTURE_PATH
+        results = {
+            "navigateur par URL": run(url, args.pages, BrowserPool(size=1, max_pages=1, **factory)),
+            "pool": run(url, args.pages, BrowserPool(size=args.size, max_pages=args.max_pages, **factory)),
+        }
+        if args.fake:
+            failures = check_pool(url)
+
+    for name, r in results.items():
+        status = "OK" if not r["errors"] else f"ÉCHEC {r['errors']}"
+        print(f"{name:<20} {r['ms_per_page']:>8} ms/page  {r['browsers']:>3} navigateur(s)  {status}")
+    for failure in failures:
+        print(f"ÉCHEC pool : {failure}")
+    if args.fake and not failures:
+        print("Pool (recyclage, erreurs, health check) : OK")
+    sys.exit(1 if failures or any(r["errors"] for r in results.values()) else 0)
+
+
+if __name__ == "__main__":
+    main()
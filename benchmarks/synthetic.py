@@ -0,0 +1,77 @@
+'''
+Données synthétiques au format Kickstarter (ks-projects-201801.csv + fichier de commentaires)
+pour les benchmarks : mêmes colonnes, mêmes types, distributions plausibles.
+'''
+
+import numpy as np
+import pandas as pd
+
+
+MAIN_CATEGORIES = [
+    "Art", "Comics", "Crafts", "Dance", "Design", "Fashion", "Film & Video", "Food",
+    "Games", "Journalism", "Music", "Photography", "Publishing", "Technology", "Theater",
+]
+COUNTRIES = ["US", "GB", "CA", "AU", "DE", "FR", "IT", "NL", "ES", "SE", "MX", "NZ", "DK",
+             "IE", "CH", "NO", "HK", "BE", "AT", "SG", "LU", "JP", 'N,0"']
+STATES = ["failed", "successful", "canceled", "undefined", "live", "suspended"]
+STATE_WEIGHTS = [0.52, 0.35, 0.10, 0.01, 0.01, 0.01]
+
+_WORDS = np.array(
+    "the a new first album film game book art project help world music short debut "
+    "community record tour series comic card board design card dream love life".split())
+_COMMENT_WORDS = np.array(
+    "great awesome love this project can't wait thanks backer update delivery shipping "
+    "when will we get it refund disappointed still waiting amazing good luck congrats "
+    "not very good bad late scam nice job team".split())
+
+
+def make_projects(n, seed=0):
+    '''
+    n projets au format de ks-projects-201801.csv.
+    '''
+    rng = np.random.default_rng(seed)
+
+    launched = pd.Timestamp("2009-05-01") + pd.to_timedelta(rng.integers(0, 3000 * 86400, n), unit="s")
+    deadline = (launched + pd.to_timedelta(rng.integers(1, 92, n), unit="D")).normalize()
+    goal = np.round(rng.lognormal(8.6, 1.7, n), 2)
+    state = rng.choice(STATES, n, p=STATE_WEIGHTS)
+    funded = np.where(state == "successful", rng.uniform(1, 3, n), rng.uniform(0, 0.95, n))
+    pledged = np.round(goal * funded, 2)
+    n_words = rng.integers(1, 10, n)
+
+    df = pd.DataFrame({
+        "ID": rng.choice(np.arange(1_000_000, 1_000_000 + 50 * n), n, replace=False),
+        "name": [" ".join(rng.choice(_WORDS, k)) for k in n_words],
+        "category": rng.choice(["Product Design", "Documentary", "Music", "Tabletop Games"], n),
+        "main_category": rng.choice(MAIN_CATEGORIES, n),
+        "currency": rng.choice(["USD", "GBP", "EUR", "CAD", "AUD"], n),
+        "deadline": deadline.strftime("%Y-%m-%d"),
+        "goal": goal,
+        "launched": launched.strftime("%Y-%m-%d %H:%M:%S"),
+        "pledged": pledged,
+        "state": state,
+        "backers": rng.poisson(40, n),
+        "country": rng.choice(COUNTRIES, n),
+        "usd pledged": pledged,
+        "usd_pledged_real": pledged,
+        "usd_goal_real": goal,
+    })
+    # Quelques titres manquants, comme dans le vrai fichier
+    df.loc[rng.random(n) < 0.0001, "name"] = np.nan
+    return df
+
+
+def make_comments(project_ids, seed=0, share=0.3):
+    '''
+    Fichier de commentaires (colonnes id, comments) : une liste de commentaires
+    sous forme de texte par projet, '[]' quand il n'y en a pas.
+    '''
+    rng = np.random.default_rng(seed)
+    ids = np.asarray(project_ids)
+    ids = ids[rng.random(len(ids)) < share]
+
+    comments = []
+    for k in rng.integers(0, 4, len(ids)):
+        texts = [" ".join(rng.choice(_COMMENT_WORDS, rng.integers(3, 15))) for _ in range(k)]
+        comments.append(repr(texts))
+    return pd.DataFrame({"id": ids, "comments": comments})
@@ -1,7 +1,8 @@
 import numpy as np
 import pandas as pd
 import joblib
-from scripts.preprocessing import df_clean_create
+from scripts.ingestion import load_projects
+from scripts.feature_store import FeatureStore
 from scripts.predict import predict_project_success
 from scripts.model import model_training_saving
 
@@ -9,9 +10,12 @@ from scripts.model import model_training_saving
 
 def main():
 
-    df = pd.read_csv('raw_data/ks-projects-201801.csv')
-    df_clean = df_clean_create(df)
-    model_training_saving(df_clean)
+    # Seuls les projets nouveaux ou mis à jour sont nettoyés, le reste est relu du feature store
+    df = load_projects('raw_data/ks-projects-201801.csv')
+    store = FeatureStore()
+    store.append(df, source='raw_data/ks-projects-201801.csv')
+    df_clean = store.load()
+    model_training_saving(df_clean, promote=True)
 
     user_input = {}
     my_dict = predict_project_success(user_input)
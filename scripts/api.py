@@ -0,0 +1,178 @@
+###---------------Imports---------------###
+
+import asyncio
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+import pandas as pd
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+from scripts.artifacts import cache_stats, load_artifacts
+from scripts.predict import predict_many
+from scripts.prediction_cache import normalize_input
+
+
+# Lancement : uvicorn scripts.api:app --host 0.0.0.0 --port 8000
+MAX_BATCH_SIZE = int(os.environ.get("KS_MAX_BATCH_SIZE", 256))
+MAX_WAIT_MS = float(os.environ.get("KS_MAX_WAIT_MS", 5))
+
+
+###---------------Schemas---------------###
+
+class Project(BaseModel):
+    name: str
+    main_category: str
+    country: str
+    launched: str                   # JJ/MM/AAAA ou AAAA-MM-JJ
+    deadline: str
+    usd_goal_real: float
+    usd_pledged_real: Optional[float] = None
+    currency: Optional[str] = None
+    comments: Optional[str] = None  # utilisé seulement par un modèle combiné texte + tabulaire
+
+
+class Prediction(BaseModel):
+    proba_success: Optional[float]
+    pred_success: int
+
+
+###---------------Micro-batching---------------###
+
+class MicroBatcher:
+    '''
+    Regroupe les requêtes arrivées dans une petite fenêtre (max_wait_ms) ou jusqu'à
+    max_batch_size projets, et les score en un seul appel à predict_many.
+    Le calcul tourne dans un thread pour ne pas bloquer la boucle asyncio.
+    '''
+
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._task = None
+        self.n_requests = 0
+        self.n_batches = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def predict(self, record):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _collect(self):
+        # On attend le premier projet, puis on remplit le batch jusqu'à la limite de temps
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            records = [record for record, _ in batch]
+            try:
+                preds = await loop.run_in_executor(None, _score, records)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.n_requests += len(batch)
+            self.n_batches += 1
+            for (_, future), pred in zip(batch, preds):
+                if not future.done():
+                    future.set_result(pred)
+
+    def stats(self):
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "requests": self.n_requests,
+            "batches": self.n_batches,
+            "mean_batch_size": round(self.n_requests / self.n_batches, 2) if self.n_batches else None,
+        }
+
+
+def _normalize(record, artifacts):
+    try:
+        return normalize_input(record, artifacts.mean_goal_by_cat, artifacts.mean_goal_by_country)
+    except ValueError:
+        # Date invalide : ligne gardée telle quelle, predict_many lui donne une probabilité NaN
+        return record
+
+
+def _score(records):
+    '''
+    Score une liste de projets (dicts) en un seul predict_proba, après la même
+    normalisation que predict_project_success (catégorie / pays, dates, titre).
+    '''
+    artifacts = load_artifacts()
+    df = pd.DataFrame([_normalize(record, artifacts) for record in records])
+    preds = predict_many(df, artifacts=artifacts)
+    return [
+        {"proba_success": None if math.isnan(p) else float(p), "pred_success": int(c)}
+        for p, c in zip(preds['proba_success'], preds['pred_success'])
+    ]
+
+
+###---------------App---------------###
+
+batcher = MicroBatcher()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Modèle chargé au démarrage, il reste ensuite en mémoire (cache du process)
+    load_artifacts()
+    batcher.start()
+    yield
+    await batcher.stop()
+
+
+app = FastAPI(title="Kickstarter Project Success Predictor", lifespan=lifespan)
+
+
+@app.post("/predict", response_model=Prediction)
+async def predict(project: Project):
+    pred = await batcher.predict(project.model_dump())
+    if pred["proba_success"] is None:
+        raise HTTPException(status_code=422, detail="Dates invalides (format JJ/MM/AAAA, launched <= deadline).")
+    return pred
+
+
+@app.post("/predict/batch", response_model=List[Prediction])
+async def predict_batch(projects: List[Project]):
+    # Déjà vectorisé : on score directement la liste entière
+    if not projects:
+        return []
+    records = [p.model_dump() for p in projects]
+    return await asyncio.get_running_loop().run_in_executor(None, _score, records)
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "batching": batcher.stats(), "artifacts": cache_stats()}
@@ -0,0 +1,242 @@
+###---------------Imports---------------###
+
+import os
+import threading
+import time
+from collections import namedtuple
+
+
+###---------------Paths---------------###
+
+MODEL_PATH = "save_pkl/model_pkl/kickstarter_model.pkl"
+MEAN_GOAL_BY_CAT_PATH = "save_pkl/mean_pkl/mean_goal_by_cat.pkl"
+MEAN_GOAL_BY_COUNTRY_PATH = "save_pkl/mean_pkl/mean_goal_by_country.pkl"
+
+# Manifest du registre (scripts.registry) : s'il a une version live, c'est elle qui est servie
+REGISTRY_MANIFEST_PATH = "save_pkl/model_registry/manifest.json"
+
+
+###---------------Cache---------------###
+
+# Une entrée du cache : l'objet chargé + la signature du fichier au moment du chargement
+_Entry = namedtuple("_Entry", ["obj", "signature", "version", "load_time"])
+
+# Les trois objets nécessaires à une prédiction, toujours servis ensemble
+Artifacts = namedtuple("Artifacts", ["model", "mean_goal_by_cat", "mean_goal_by_country", "version"])
+
+
+def _joblib_load(path):
+    # joblib n'est importé qu'au premier chargement
+    import joblib
+    return joblib.load(path)
+
+
+def _registry_load(pipeline_path):
+    # pipeline_path : <registre>/<version>/pipeline.joblib
+    from scripts.registry import ModelRegistry
+    folder = os.path.dirname(pipeline_path)
+    return ModelRegistry(os.path.dirname(folder)).load(os.path.basename(folder))
+
+
+def _file_signature(path):
+    '''
+    Signature bon marché d'un fichier : (mtime en ns, taille). Un seul appel à os.stat.
+    '''
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ArtifactCache:
+    '''
+    Charge chaque artefact (pickle joblib) une seule fois par process et le recharge
+    uniquement si le fichier a changé sur le disque (mtime ou taille).
+
+    Le remplacement est atomique : l'entrée n'est publiée qu'une fois l'objet
+    entièrement chargé, donc un appel en cours garde l'ancienne version jusqu'au bout.
+    Si le nouveau fichier est illisible (copie en cours...), on continue à servir
+    l'ancienne version.
+    '''
+
+    def __init__(self, loader=None):
+        self._loader = loader
+        self._entries = {}
+        self._locks = {}
+        self._global_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._reloads = 0
+        self._errors = 0
+
+    def _lock_for(self, path):
+        with self._global_lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def get_entry(self, path, loader=None):
+        path = os.path.abspath(path)
+        entry = self._entries.get(path)
+        try:
+            signature = _file_signature(path)
+        except OSError:
+            # Fichier absent un court instant (remplacement en cours) : on garde la version chargée
+            if entry is None:
+                raise
+            self._errors += 1
+            return entry
+        if entry is not None and entry.signature == signature:
+            self._hits += 1
+            return entry
+
+        # Un seul thread charge le fichier, les autres attendent puis réutilisent le résultat
+        with self._lock_for(path):
+            entry = self._entries.get(path)
+            try:
+                signature = _file_signature(path)
+            except OSError:
+                if entry is None:
+                    raise
+                self._errors += 1
+                return entry
+            if entry is not None and entry.signature == signature:
+                self._hits += 1
+                return entry
+
+            start = time.perf_counter()
+            try:
+                obj = (loader or self._loader or _joblib_load)(path)
+            except Exception:
+                self._errors += 1
+                if entry is not None:
+                    return entry
+                raise
+            load_time = time.perf_counter() - start
+
+            # Le fichier a pu changer pendant le chargement : on garde la signature d'avant,
+            # le prochain appel verra la différence et rechargera.
+            version = (entry.version + 1) if entry is not None else 1
+            new_entry = _Entry(obj, signature, version, load_time)
+            self._entries[path] = new_entry   # publication atomique
+
+            self._misses += 1
+            if entry is not None:
+                self._reloads += 1
+            return new_entry
+
+    def get(self, path, loader=None):
+        '''
+        Renvoie l'objet chargé depuis path, en le (re)chargeant seulement si besoin.
+        '''
+        return self.get_entry(path, loader).obj
+
+    def discard(self, path):
+        '''
+        Oublie l'objet chargé depuis path (ex. ancienne version live après un promote).
+        '''
+        with self._global_lock:
+            self._entries.pop(os.path.abspath(path), None)
+
+    def clear(self):
+        with self._global_lock:
+            self._entries = {}
+
+    def stats(self):
+        '''
+        Statistiques du cache : hits, misses, reloads et temps de chargement par fichier.
+        '''
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "reloads": self._reloads,
+            "errors": self._errors,
+            "artifacts": {
+                path: {
+                    "version": entry.version,
+                    "load_time_s": round(entry.load_time, 4),
+                    "mtime_ns": entry.signature[0],
+                    "size": entry.signature[1],
+                }
+                for path, entry in self._entries.items()
+            },
+        }
+
+
+# Cache unique pour tout le process
+_cache = ArtifactCache()
+
+
+def get_cache():
+    return _cache
+
+
+# Version live du registre : (signature du manifest, chemin du pipeline live). Le manifest
+# n'est relu que quand il change, et seul un changement de version live change le chemin.
+_live = (None, None)
+
+
+def _live_pipeline_path(manifest_path=REGISTRY_MANIFEST_PATH):
+    '''
+    Chemin du pipeline de la version live du registre (None sans version live).
+
+    Un register() sans promote réécrit le manifest mais garde la même version live :
+    le chemin ne change pas, le modèle servi (et les caches qui dépendent de sa
+    version) non plus.
+    '''
+    global _live
+    signature = _file_signature(manifest_path)
+    manifest_signature, path = _live
+    if signature != manifest_signature:
+        import json
+        with open(manifest_path) as f:
+            live = json.load(f).get("live")
+        new_path = os.path.join(os.path.dirname(manifest_path), live, "pipeline.joblib") if live else None
+        if path is not None and new_path != path:
+            _cache.discard(path)      # ancienne version live : plus servie
+        path = new_path
+        _live = (signature, path)
+    return path
+
+
+def is_self_contained(model):
+    '''
+    True si le pipeline recrée lui-même les features (GoalRatioEncoder inclus).
+    '''
+    return 'goal_ratio' in getattr(model, 'named_steps', {})
+
+
+def load_artifacts(model_path=None,
+                   cat_path=MEAN_GOAL_BY_CAT_PATH,
+                   country_path=MEAN_GOAL_BY_COUNTRY_PATH):
+    '''
+    Renvoie le modèle et les dictionnaires de moyennes depuis le cache du process.
+    La version identifie la combinaison des fichiers actuellement chargés.
+
+    Pour un pipeline qui contient son GoalRatioEncoder, les moyennes viennent du
+    modèle lui-même et les pickles de moyennes ne sont pas lus.
+
+    Sans model_path, la version live du registre des modèles est servie si elle existe
+    (sinon MODEL_PATH). Le cache porte sur le nom de la version live et la signature de
+    ses fichiers : seul un promote (ou une modification de ces fichiers) la recharge.
+    Un model_path explicite charge toujours ce fichier-là, même égal à MODEL_PATH.
+    '''
+    model = None
+    live_path = None
+    if model_path is None and os.path.exists(REGISTRY_MANIFEST_PATH):
+        live_path = _live_pipeline_path()
+        if live_path is not None:
+            model = _cache.get_entry(live_path, loader=_registry_load)
+    if model is None:
+        model = _cache.get_entry(model_path or MODEL_PATH)
+    if is_self_contained(model.obj):
+        encoder = model.obj.named_steps['goal_ratio']
+        version = f"{model.signature[0]}-{model.signature[1]}"
+        if live_path is not None:
+            version = f"{os.path.basename(os.path.dirname(live_path))}-{version}"
+        return Artifacts(model.obj, encoder.mean_goal_by_cat_, encoder.mean_goal_by_country_, version)
+
+    cat = _cache.get_entry(cat_path)
+    country = _cache.get_entry(country_path)
+    version = f"{model.signature[0]}-{model.signature[1]}-{cat.version}-{country.version}"
+    return Artifacts(model.obj, cat.obj, country.obj, version)
+
+
+def cache_stats():
+    return _cache.stats()
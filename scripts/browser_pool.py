@@ -0,0 +1,214 @@
+###---------------Imports---------------###
+
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Nombre de navigateurs headless gardés ouverts, et pages servies avant recyclage
+POOL_SIZE = int(os.environ.get("KS_BROWSER_POOL_SIZE", 2))
+MAX_PAGES = int(os.environ.get("KS_BROWSER_MAX_PAGES", 50))
+
+USER_AGENT = ("Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
+
+
+###---------------Chrome---------------###
+
+def chrome_options():
+    '''
+    Chrome headless (langue forcée en EN, devise UI en $ via ton paramétrage sur le site).
+    '''
+    from selenium.webdriver.chrome.options import Options
+
+    opts = Options()
+    opts.add_experimental_option("prefs", {"intl.accept_languages": "en-US,en"})
+    opts.add_argument("--lang=en-US")
+    opts.add_argument("--headless=new")
+    opts.add_argument("--window-size=1366,768")
+    opts.add_argument("--disable-dev-shm-usage"); opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-blink-features=AutomationControlled")
+    opts.add_argument(f"--user-agent={USER_AGENT}")
+    return opts
+
+
+def new_chrome():
+    from selenium import webdriver
+    return webdriver.Chrome(options=chrome_options())
+
+
+###---------------Pool---------------###
+
+class _Session:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created = time.monotonic()
+
+
+class BrowserPool:
+    '''
+    Pool de navigateurs headless réutilisés d'une page à l'autre : le démarrage de
+    Chrome (l'essentiel de la latence d'un scraping) n'est payé qu'une fois par session.
+
+    - size : nombre maximum de navigateurs ouverts en même temps ; un appel de plus
+      attend qu'une session se libère (acquire_timeout secondes au plus).
+    - max_pages : une session est fermée et remplacée après max_pages pages
+      (mémoire de Chrome qui grossit), ou dès qu'une erreur survient pendant son usage.
+    - Avant d'être prêtée, une session inactive passe un health check (petit
+      execute_script) ; si le navigateur ne répond plus, il est remplacé.
+
+    factory : fonction sans argument qui renvoie un driver (new_chrome par défaut) ;
+    permet d'utiliser un autre navigateur ou un faux driver.
+    '''
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES, factory=new_chrome, acquire_timeout=60):
+        if size < 1:
+            raise ValueError(f"size doit être >= 1 (reçu : {size})")
+        self.size = size
+        self.max_pages = max_pages
+        self.factory = factory
+        self.acquire_timeout = acquire_timeout
+
+        self._idle = []
+        self._n_open = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        self.created = 0
+        self.recycled = 0
+        self.errors = 0
+        self.failed_checks = 0
+        self.pages = 0
+
+    ###---------------Sessions---------------###
+
+    def _healthy(self, session):
+        try:
+            return session.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, session):
+        try: session.driver.quit()
+        except Exception: pass
+
+    def acquire(self):
+        '''
+        Renvoie une session en bon état (réutilisée, sinon créée si le pool n'est pas plein).
+        '''
+        deadline = time.monotonic() + self.acquire_timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._n_open >= self.size:
+                    if self._closed:
+                        raise RuntimeError("BrowserPool fermé")
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"Aucun navigateur libre après {self.acquire_timeout}s")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("BrowserPool fermé")
+                session = self._idle.pop() if self._idle else None
+                if session is None:
+                    self._n_open += 1     # place réservée, le navigateur est créé hors du verrou
+
+            if session is None:
+                try:
+                    session = _Session(self.factory())
+                except Exception:
+                    self._discard(None)
+                    raise
+                with self._cond:
+                    self.created += 1
+                return session
+
+            if self._healthy(session):
+                return session
+            # Navigateur mort (crash, fermé) : on le remplace
+            with self._cond:
+                self.failed_checks += 1
+            self._discard(session)
+
+    def _discard(self, session):
+        if session is not None:
+            self._quit(session)
+        with self._cond:
+            self._n_open -= 1
+            self._cond.notify()
+
+    def release(self, session, broken=False):
+        '''
+        Rend une session au pool ; elle est fermée si broken ou après max_pages pages.
+        '''
+        session.pages += 1
+        with self._cond:
+            self.pages += 1
+            self.errors += broken
+            if not (broken or session.pages >= self.max_pages or self._closed):
+                self._idle.append(session)
+                self._cond.notify()
+                return
+            self.recycled += not broken
+        self._discard(session)
+
+    @contextmanager
+    def borrow(self):
+        '''
+        with pool.borrow() as driver: ... -- la session est rendue à la sortie,
+        et recyclée si une exception est levée dans le bloc.
+        '''
+        session = self.acquire()
+        try:
+            yield session.driver
+        except BaseException:
+            self.release(session, broken=True)
+            raise
+        self.release(session)
+
+    def close(self):
+        '''
+        Ferme les navigateurs inactifs ; ceux en cours d'usage sont fermés à leur retour.
+        '''
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for session in idle:
+            self._discard(session)
+
+    def stats(self):
+        return {
+            "size": self.size,
+            "max_pages": self.max_pages,
+            "open": self._n_open,
+            "idle": len(self._idle),
+            "created": self.created,
+            "recycled": self.recycled,
+            "errors": self.errors,
+            "failed_checks": self.failed_checks,
+            "pages": self.pages,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+# Pool unique pour tout le process, créé au premier scraping
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,154 @@
+###---------------Imports---------------###
+
+import hashlib
+import os
+import sqlite3
+import time
+
+
+COMMENT_CACHE_PATH = "save_pkl/comment_cache/comments.sqlite"
+COMMENT_CACHE_MAX_MB = float(os.environ.get("KS_COMMENT_CACHE_MAX_MB", 2048))
+
+# Nombre de clés par requête (limite de variables SQLite)
+_BATCH = 900
+
+
+###---------------Clés---------------###
+
+def comment_key(raw, version):
+    '''
+    Clé d'un commentaire : sha1 du texte brut et de la version du preprocessing.
+    Changer de version invalide tout le cache sans avoir à le vider.
+    '''
+    return hashlib.sha1(f"{version}\x00{raw}".encode("utf-8")).hexdigest()
+
+
+###---------------Cache disque---------------###
+
+class CommentCache:
+    '''
+    Cache disque (SQLite) des commentaires déjà nettoyés et lemmatisés, adressé
+    par le contenu (comment_key) : on ne retraite que les commentaires nouveaux
+    ou modifiés.
+
+    La taille (textes stockés) est plafonnée à max_mb : au-delà, on supprime les
+    entrées les moins récemment utilisées jusqu'à retomber à 90 % du plafond.
+    '''
+
+    def __init__(self, path=COMMENT_CACHE_PATH, max_mb=COMMENT_CACHE_MAX_MB):
+        self.path = path
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS comments ("
+            " key TEXT PRIMARY KEY, processed TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_used REAL NOT NULL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON comments(last_used)")
+        self._conn.commit()
+
+    ###---------------Lecture / écriture---------------###
+
+    def get_many(self, keys):
+        '''
+        Dictionnaire clé -> texte traité pour les clés présentes dans le cache.
+        '''
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        for start in range(0, len(keys), _BATCH):
+            batch = keys[start:start + _BATCH]
+            marks = ",".join("?" * len(batch))
+            rows = self._conn.execute(
+                f"SELECT key, processed FROM comments WHERE key IN ({marks})", batch)
+            found.update(rows)
+
+        # Les entrées lues redeviennent récentes (pour l'éviction LRU)
+        now = time.time()
+        self._conn.executemany("UPDATE comments SET last_used = ? WHERE key = ?",
+                               ((now, key) for key in found))
+        self._conn.commit()
+
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items):
+        '''
+        Enregistre un dictionnaire clé -> texte traité, puis applique le plafond de taille.
+        '''
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO comments (key, processed, size, last_used) VALUES (?, ?, ?, ?)",
+            ((key, text, len(key) + len(text.encode("utf-8")), now) for key, text in items.items()))
+        self._conn.commit()
+        self.evict()
+
+    def evict(self):
+        '''
+        Supprime les entrées les moins récemment utilisées si le cache dépasse max_bytes.
+        Renvoie le nombre d'entrées supprimées.
+        '''
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return 0
+
+        target = total - int(self.max_bytes * 0.9)
+        freed, victims = 0, []
+        for key, size in self._conn.execute("SELECT key, size FROM comments ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM comments WHERE key = ?", victims)
+        self._conn.commit()
+
+        self.evictions += len(victims)
+        return len(victims)
+
+    def clear(self):
+        self._conn.execute("DELETE FROM comments")
+        self._conn.commit()
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        self._conn.close()
+
+    ###---------------Stats---------------###
+
+    def size_bytes(self):
+        return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM comments").fetchone()[0]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "size_mb": round(self.size_bytes() / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+            "evictions": self.evictions,
+        }
+
+    def report(self):
+        s = self.stats()
+        rate = f"{s['hit_rate']:.0%}" if s["hit_rate"] is not None else "-"
+        print(f"Cache commentaires : {s['hits']} hits, {s['misses']} misses ({rate}), "
+              f"{s['entries']} entrées, {s['size_mb']} / {s['max_mb']} Mo, "
+              f"{s['evictions']} évictions")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
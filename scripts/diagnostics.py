@@ -0,0 +1,208 @@
+'''
+Diagnostics des modèles : courbes d'apprentissage en parallèle (budget de threads,
+résultats en cache disque) et mots les plus indicatifs par sélection partielle.
+
+    curve = learning_curve_data(model, X_train_transformed, y_train, train_sizes, n_threads=8)
+    plot_learning_curve(curve, "learning_curve.png")
+'''
+
+###---------------Imports---------------###
+
+import hashlib
+import os
+import time
+
+import numpy as np
+
+from scripts.search import _fingerprint, thread_budget
+
+
+# Courbes déjà calculées : le graphique se régénère sans refaire les fits
+DIAGNOSTICS_DIR = "save_pkl/diagnostics"
+
+
+###---------------Top-k---------------###
+
+def top_k(values, k=20, largest=True):
+    '''
+    Indices des k plus grandes (ou plus petites) valeurs, triés : argpartition en O(n)
+    puis tri des k seules valeurs retenues, au lieu d'un argsort complet.
+    '''
+    values = np.asarray(values).ravel()
+    k = min(k, len(values))
+    if k == 0:
+        return np.array([], dtype=int)
+    keys = -values if largest else values
+    idx = np.argpartition(keys, k - 1)[:k]
+    return idx[np.argsort(keys[idx], kind='stable')]
+
+
+def _feature_names(vectorizer, idx):
+    # HashingVectorizer : pas de vocabulaire, on affiche le numéro de colonne
+    if not hasattr(vectorizer, 'get_feature_names_out'):
+        return [f"#{i}" for i in idx]
+    try:
+        names = vectorizer.get_feature_names_out()
+    except (AttributeError, TypeError, ValueError):
+        return [f"#{i}" for i in idx]
+    return [names[i] for i in idx]
+
+
+def important_words(model, vectorizer, k=20):
+    '''
+    Mots les plus indicatifs de succès et d'échec d'un modèle linéaire (coef_).
+    Renvoie (succès, échecs) : listes de (mot, coefficient).
+    '''
+    coefficients = np.asarray(model.coef_[0]).ravel()
+
+    results = []
+    for largest, label in ((True, "SUCCÈS"), (False, "ÉCHEC")):
+        idx = top_k(coefficients, k, largest=largest)
+        words = list(zip(_feature_names(vectorizer, idx), coefficients[idx]))
+        print(f"\nMots les plus indicatifs de {label}:")
+        for word, coef in words:
+            print(f"{word}: {coef:.3f}")
+        results.append(words)
+    return tuple(results)
+
+
+###---------------Courbes d'apprentissage---------------###
+
+def _curve_key(model, X, y, train_sizes, cv, scoring, random_state):
+    h = hashlib.sha1()
+    _fingerprint(h, X)
+    _fingerprint(h, np.asarray(y))
+    h.update(repr(sorted(model.get_params().items(), key=lambda kv: kv[0])).encode())
+    h.update(repr((list(map(int, train_sizes)), cv, scoring, random_state)).encode())
+    return h.hexdigest()[:16]
+
+
+def _rows(X, idx):
+    return X.iloc[idx] if hasattr(X, 'iloc') else X[idx]
+
+
+def _fold_data(model, X, y, train, val):
+    '''
+    Matrices train / validation d'un fold. Pour un Pipeline, les étapes avant le
+    classifieur sont ajustées une seule fois sur tout le train du fold et réutilisées
+    pour toutes les tailles (seul le classifieur est réajusté).
+    '''
+    from sklearn.base import clone
+    from sklearn.pipeline import Pipeline
+
+    X_train, X_val = _rows(X, train), _rows(X, val)
+    y_train, y_val = y[train], y[val]
+    if isinstance(model, Pipeline) and len(model.steps) > 1:
+        preprocessing = clone(model[:-1])
+        X_train = preprocessing.fit_transform(X_train, y_train)
+        X_val = preprocessing.transform(X_val)
+    return X_train, y_train, X_val, y_val
+
+
+def _fit_size(estimator, X_train, y_train, X_val, y_val, size, scorer):
+    '''
+    Un point de la courbe (exécuté dans un worker joblib) : fit sur les size premières
+    lignes du train du fold, score train et validation.
+    '''
+    start = time.perf_counter()
+    estimator.fit(_rows(X_train, slice(0, size)), y_train[:size])
+    fit_time = time.perf_counter() - start
+    return (scorer(estimator, _rows(X_train, slice(0, size)), y_train[:size]),
+            scorer(estimator, X_val, y_val), fit_time)
+
+
+def learning_curve_data(model, X, y, train_sizes, cv=5, scoring='accuracy', n_threads=None,
+                        cache_dir=DIAGNOSTICS_DIR, random_state=42):
+    '''
+    Courbe d'apprentissage : pour chaque fold et chaque taille, fit sur les premières
+    lignes du train du fold et score sur la validation (comme sklearn.learning_curve).
+
+    - Les (taille x fold) fits tournent en parallèle sous un budget de n_threads
+      (thread_budget : fits en parallèle x threads par modèle, pas de sur-souscription).
+    - Un Pipeline ne réajuste que son classifieur : le preprocessing (vectorizer...)
+      est ajusté une fois par fold.
+    - Le résultat est gardé dans cache_dir (clé : données, paramètres, tailles, cv) ;
+      None pour ne pas utiliser de cache.
+
+    Renvoie un dict : train_sizes, train_scores et test_scores (tailles x folds), fit_times.
+    '''
+    from joblib import Parallel, delayed
+    from sklearn.base import clone
+    from sklearn.metrics import check_scoring
+    from sklearn.model_selection import check_cv
+
+    y = np.asarray(y)
+    train_sizes = np.unique(np.asarray(train_sizes, dtype=int))
+
+    path = None
+    if cache_dir is not None:
+        key = _curve_key(model, X, y, train_sizes, cv, scoring, random_state)
+        path = os.path.join(cache_dir, f"learning_curve_{key}.npz")
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                print(f"Courbe d'apprentissage relue depuis {path}")
+                return {name: cached[name] for name in cached.files}
+
+    folds = list(check_cv(cv, y, classifier=True).split(X, y))
+    # Tailles plus grandes que le train d'un fold : ramenées à la taille du plus petit train
+    max_size = min(len(train) for train, _ in folds)
+    train_sizes = np.unique(np.minimum(train_sizes, max_size))
+
+    n_tasks = len(train_sizes) * len(folds)
+    n_jobs, model_threads = thread_budget(n_tasks, n_threads)
+    estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+    if 'n_jobs' in estimator.get_params():
+        estimator = clone(estimator).set_params(n_jobs=model_threads)
+    scorer = check_scoring(estimator, scoring=scoring)
+    print(f"Courbe d'apprentissage : {len(train_sizes)} tailles x {len(folds)} folds, "
+          f"{n_jobs} fits en parallèle x {model_threads} thread(s)")
+
+    start = time.perf_counter()
+    fold_data = [_fold_data(model, X, y, train, val) for train, val in folds]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_size)(clone(estimator), *data, size, scorer)
+        for size in train_sizes for data in fold_data)
+    print(f"{n_tasks} fits en {time.perf_counter() - start:.1f}s")
+
+    scores = np.array(results, dtype=np.float64).reshape(len(train_sizes), len(folds), 3)
+    curve = {
+        'train_sizes': train_sizes,
+        'train_scores': scores[:, :, 0],
+        'test_scores': scores[:, :, 1],
+        'fit_times': scores[:, :, 2],
+    }
+
+    if path is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, **curve)
+        os.replace(tmp, path)
+    return curve
+
+
+def plot_learning_curve(curve, output_path=None, show=False):
+    '''
+    Trace la courbe (moyenne des folds) et l'enregistre dans output_path (par défaut
+    DIAGNOSTICS_DIR/learning_curve.png), sans bloquer un run batch ou headless.
+    show=True : ouvre aussi la fenêtre (plt.show(), bloquant).
+    '''
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots()
+    ax.plot(curve['train_sizes'], curve['train_scores'].mean(axis=1), label='Training score')
+    ax.plot(curve['train_sizes'], curve['test_scores'].mean(axis=1), label='Test score')
+    ax.set_xlabel('Training set size')
+    ax.set_ylabel('Score')
+    ax.legend()
+
+    if output_path is None:
+        output_path = os.path.join(DIAGNOSTICS_DIR, "learning_curve.png")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    fig.savefig(output_path)
+    print(f"Courbe d'apprentissage enregistrée dans {output_path}")
+
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
+    return fig
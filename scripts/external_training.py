@@ -0,0 +1,296 @@
+'''
+Entraînement XGBoost hors mémoire : les features sont créées bloc par bloc
+(df_clean_create_chunked -> Parquet), puis lues par lots par un DataIter XGBoost
+(QuantileDMatrix ou ExtMemQuantileDMatrix, tree_method='hist').
+
+Usage :
+    python -m scripts.external_training raw_data/ks-projects-201801.csv
+    python -m scripts.external_training raw_data/ks-projects-201801.csv --mode in_memory
+    python -m scripts.external_training raw_data/ks-projects-201801.csv --compare
+'''
+
+###---------------Imports---------------###
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from scripts.predict import _peak_rss_mb
+from scripts.preprocessing import df_clean_create_chunked
+from scripts.registry import REGISTRY_DIR, ModelRegistry
+
+
+# Hyperparamètres par défaut (pas de recherche dans ce mode)
+DEFAULT_PARAMS = {
+    'n_estimators': 300,
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'subsample': 1.0,
+    'colsample_bytree': 1.0,
+}
+
+TRAINING_MODES = ('external', 'quantile', 'in_memory')
+
+
+###---------------Lecture par lots---------------###
+
+def _label(batch):
+    return (batch['state'] == 'successful').to_numpy(dtype=np.float32)
+
+
+def _fit_preprocessor(features_path, sample_rows, batch_size, seed=42):
+    '''
+    Ajuste le ColumnTransformer sur un échantillon aléatoire des features (médianes,
+    moyennes / écarts-types, modalités) : un arbre ne dépend pas de l'échelle exacte.
+    '''
+    import pyarrow.parquet as pq
+    from scripts.model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, build_preprocessor
+
+    parquet = pq.ParquetFile(features_path)
+    share = min(1.0, sample_rows / max(1, parquet.metadata.num_rows))
+    rng = np.random.default_rng(seed)
+
+    columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES
+    sample = []
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+        batch = batch.to_pandas()
+        sample.append(batch[rng.random(len(batch)) < share])
+    return build_preprocessor().fit(pd.concat(sample, ignore_index=True))
+
+
+def make_batch_iter(features_path, preprocessor, batch_size=100_000, cache_prefix=None):
+    '''
+    DataIter XGBoost sur le fichier Parquet des features : chaque lot est transformé
+    par le preprocessor (matrice creuse) puis passé à XGBoost avec son label.
+    Seul un lot est en mémoire à la fois.
+    '''
+    import pyarrow.parquet as pq
+    import xgboost as xgb
+    from scripts.model import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+
+    columns = NUMERIC_FEATURES + CATEGORICAL_FEATURES + ['state']
+
+    class ParquetBatchIter(xgb.DataIter):
+
+        def __init__(self):
+            self._batches = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def reset(self):
+            self._batches = pq.ParquetFile(features_path).iter_batches(batch_size=batch_size, columns=columns)
+
+        def next(self, input_data):
+            if self._batches is None:
+                self.reset()
+            batch = next(self._batches, None)
+            if batch is None:
+                return False
+            batch = batch.to_pandas()
+            input_data(data=preprocessor.transform(batch), label=_label(batch))
+            return True
+
+    return ParquetBatchIter()
+
+
+###---------------Entraînement---------------###
+
+def train_external_memory(data_path, mode='external', params=None, registry_dir=REGISTRY_DIR, promote=False,
+                          chunksize=200_000, batch_size=100_000, sample_rows=200_000,
+                          n_threads=None, workdir=None):
+    '''
+    Entraîne le pipeline Kickstarter sur un CSV brut plus gros que la RAM.
+
+    1. df_clean_create_chunked : moyennes d'objectif + features écrites en Parquet.
+    2. ColumnTransformer ajusté sur un échantillon (sample_rows lignes).
+    3. XGBoost 'hist' alimenté par lots via un DataIter :
+       mode='external' : ExtMemQuantileDMatrix, les pages quantifiées sont en cache disque ;
+       mode='quantile' : QuantileDMatrix, matrice quantifiée compacte en mémoire.
+    4. Le booster est remis dans le même Pipeline que model_training_saving
+       (features, goal_ratio, preprocessor, clf) et enregistré dans le registre des modèles.
+
+    Renvoie (pipeline, rapport) ; le rapport contient les temps par étape et le pic RSS.
+    '''
+    import shutil
+
+    import xgboost as xgb
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBClassifier
+    from scripts.feature_engineering import ProjectFeatures
+
+    if mode not in ('external', 'quantile'):
+        raise ValueError(f"mode doit être 'external' ou 'quantile' (reçu : {mode!r})")
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    # Dossier de travail (features Parquet, cache XGBoost) supprimé à la fin s'il est temporaire
+    temporary = workdir is None
+    workdir = workdir or tempfile.mkdtemp(prefix="ks_external_")
+    features_path = os.path.join(workdir, "features.parquet")
+    timings = {}
+
+    start = time.perf_counter()
+    # Encoder avec ses effectifs : update_model pourra mettre les moyennes à jour (partial_fit)
+    _, _, encoder = df_clean_create_chunked(data_path, features_path, chunksize=chunksize, return_encoder=True)
+    timings['features_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preprocessor = _fit_preprocessor(features_path, sample_rows, batch_size)
+    timings['preprocessor_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if mode == 'external':
+        batches = make_batch_iter(features_path, preprocessor, batch_size,
+                                  cache_prefix=os.path.join(workdir, "xgb_cache"))
+        dtrain = xgb.ExtMemQuantileDMatrix(batches, nthread=n_threads)
+    else:
+        dtrain = xgb.QuantileDMatrix(make_batch_iter(features_path, preprocessor, batch_size), nthread=n_threads)
+    timings['dmatrix_s'] = time.perf_counter() - start
+
+    booster_params = {
+        'objective': 'binary:logistic',
+        'eval_metric': 'logloss',
+        'tree_method': 'hist',
+        'max_depth': params['max_depth'],
+        'eta': params['learning_rate'],
+        'subsample': params['subsample'],
+        'colsample_bytree': params['colsample_bytree'],
+        'seed': 42,
+    }
+    if n_threads:
+        booster_params['nthread'] = n_threads
+
+    start = time.perf_counter()
+    booster = xgb.train(booster_params, dtrain, num_boost_round=params['n_estimators'])
+    timings['train_s'] = time.perf_counter() - start
+
+    # Même pipeline que model_training_saving : utilisable tel quel par predict.py
+    clf = XGBClassifier(eval_metric='logloss', random_state=42, tree_method='hist', **params)
+    clf.load_model(bytearray(booster.save_raw(raw_format='ubj')))
+    pipeline = Pipeline(steps=[
+        ('features', ProjectFeatures()),
+        ('goal_ratio', encoder),
+        ('preprocessor', preprocessor),
+        ('clf', clf)])
+
+    report = _report(mode, dtrain.num_row(), timings)
+    report['version'] = _register(pipeline, params, report, registry_dir, promote)
+    del dtrain
+    if temporary:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return pipeline, report
+
+
+def train_in_memory(data_path, params=None, registry_dir=None, promote=False):
+    '''
+    Chemin de référence : tout le CSV en mémoire (load_projects + df_clean_create),
+    pipeline complet ajusté avec les mêmes hyperparamètres. Renvoie (pipeline, rapport).
+    '''
+    from sklearn.pipeline import Pipeline
+    from xgboost import XGBClassifier
+    from scripts.feature_engineering import GoalRatioEncoder, ProjectFeatures
+    from scripts.ingestion import load_projects
+    from scripts.model import build_preprocessor
+    from scripts.preprocessing import df_clean_create
+
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    timings = {}
+
+    start = time.perf_counter()
+    df = df_clean_create(load_projects(data_path, verbose=False))
+    y = (df['state'] == 'successful').astype(int)
+    X = df.drop(columns=['state'])
+    timings['features_s'] = time.perf_counter() - start
+
+    pipeline = Pipeline(steps=[
+        ('features', ProjectFeatures()),
+        ('goal_ratio', GoalRatioEncoder()),
+        ('preprocessor', build_preprocessor()),
+        ('clf', XGBClassifier(eval_metric='logloss', random_state=42, tree_method='hist', **params))])
+
+    start = time.perf_counter()
+    pipeline.fit(X, y)
+    timings['train_s'] = time.perf_counter() - start
+
+    report = _report('in_memory', len(X), timings)
+    if registry_dir is not None:
+        report['version'] = _register(pipeline, params, report, registry_dir, promote)
+    return pipeline, report
+
+
+def _register(pipeline, params, report, registry_dir, promote):
+    from scripts.model import CATEGORICAL_FEATURES, NUMERIC_FEATURES
+
+    metrics = {k: v for k, v in report.items() if k != 'mode'}
+    features = {'numeric': NUMERIC_FEATURES, 'categorical': CATEGORICAL_FEATURES}
+    return ModelRegistry(registry_dir).register(pipeline, params=params, metrics=metrics, features=features,
+                                                source=f"{report['mode']}_training", promote=promote)
+
+
+def _report(mode, rows, timings):
+    report = {
+        'mode': mode,
+        'rows': int(rows),
+        **{k: round(v, 2) for k, v in timings.items()},
+        'total_s': round(sum(timings.values()), 2),
+        'peak_rss_mb': round(_peak_rss_mb(), 1) if _peak_rss_mb() is not None else None,
+    }
+    peak = f"{report['peak_rss_mb']:.0f} Mo" if report['peak_rss_mb'] is not None else "-"
+    print(f"[{mode}] {report['rows']} lignes, total {report['total_s']}s "
+          f"(entraînement {report['train_s']}s), pic RSS {peak}")
+    return report
+
+
+###---------------Comparaison---------------###
+
+def compare_modes(data_path, modes=TRAINING_MODES, **kwargs):
+    '''
+    Lance chaque mode dans un process neuf (pic RSS propre à chaque mode) et affiche
+    temps et mémoire côte à côte.
+    '''
+    reports = []
+    for mode in modes:
+        cmd = [sys.executable, "-m", "scripts.external_training", data_path, "--mode", mode, "--json",
+               "--registry-dir", kwargs.get('registry_dir') or tempfile.mkdtemp(prefix="ks_registry_")]
+        out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+        reports.append(json.loads(out.strip().splitlines()[-1]))
+
+    print(f"{'mode':<10} {'lignes':>10} {'features s':>11} {'train s':>9} {'total s':>9} {'pic RSS Mo':>11}")
+    for r in reports:
+        print(f"{r['mode']:<10} {r['rows']:>10} {r['features_s']:>11} {r['train_s']:>9} "
+              f"{r['total_s']:>9} {r['peak_rss_mb'] or '-':>11}")
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement XGBoost hors mémoire")
+    parser.add_argument("data_path", help="CSV brut au format ks-projects-201801.csv")
+    parser.add_argument("--mode", choices=TRAINING_MODES, default="external")
+    parser.add_argument("--compare", action="store_true", help="compare les trois modes (temps, pic RSS)")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    parser.add_argument("--promote", action="store_true", help="la nouvelle version devient la version live")
+    parser.add_argument("--batch-size", type=int, default=100_000)
+    parser.add_argument("--json", action="store_true", help="rapport JSON sur la dernière ligne")
+    args = parser.parse_args()
+
+    if args.compare:
+        # Registre jetable : les modèles de comparaison ne polluent pas le vrai registre
+        compare_modes(args.data_path)
+        return
+
+    if args.mode == "in_memory":
+        _, report = train_in_memory(args.data_path, registry_dir=args.registry_dir, promote=args.promote)
+    else:
+        _, report = train_external_memory(args.data_path, mode=args.mode, registry_dir=args.registry_dir,
+                                          promote=args.promote,
+                                          batch_size=args.batch_size)
+    if args.json:
+        print(json.dumps(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+###---------------Imports---------------###
+
+import math
+from datetime import date, datetime
+
+import numpy as np
+
+
+DATE_FORMAT_ERROR = "Erreur dans le format de date. Format attendu : JJ/MM/AAAA."
+DATE_ORDER_ERROR = "Erreur : La date 'launched' ne peut pas être postérieure à 'deadline'."
+
+# Formats rencontrés : formulaire Streamlit, scraper, CSV Kickstarter
+_DATE_FORMATS = ("%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S")
+
+
+###---------------Functions---------------###
+
+def parse_date(value):
+    '''
+    Parse une date sans passer par pandas pour les formats connus ;
+    les autres passent par pd.to_datetime(dayfirst=True) comme le chemin pandas.
+    '''
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    if not isinstance(value, str):
+        raise ValueError(DATE_FORMAT_ERROR)
+
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+
+    import pandas as pd
+    try:
+        return pd.to_datetime(value, dayfirst=True, errors='raise').to_pydatetime()
+    except Exception:
+        raise ValueError(DATE_FORMAT_ERROR)
+
+
+def _float_or_nan(value):
+    if value is None:
+        return math.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+###---------------Scorer---------------###
+
+class CompiledScorer:
+    '''
+    Version "compilée" du pipeline entraîné dans model_training_saving, pour
+    scorer un seul projet (dict) sans DataFrame ni ColumnTransformer.
+
+    On extrait du pipeline les médianes + moyennes/écarts-types du StandardScaler,
+    les modalités du OneHotEncoder et le booster XGBoost, puis on construit
+    directement la ligne de features en NumPy et on appelle booster.inplace_predict.
+    Les probabilités sont identiques à celles de model.predict_proba.
+
+    Modèle combiné texte + tabulaire : le commentaire est traité et hashé à part, et
+    ajouté à la ligne tabulaire en une ligne CSR (jamais densifiée).
+    '''
+
+    def __init__(self, pipeline, mean_goal_by_cat, mean_goal_by_country):
+        preprocessor = pipeline.named_steps['preprocessor']
+        clf = pipeline.named_steps['clf']
+
+        self.mean_goal_by_cat = mean_goal_by_cat
+        self.mean_goal_by_country = mean_goal_by_country
+
+        transformers = {name: (trans, cols) for name, trans, cols in preprocessor.transformers_}
+        unknown = set(transformers) - {'num', 'cat', 'text', 'remainder'}
+        if unknown:
+            raise KeyError(f"transformers non gérés : {sorted(unknown)}")
+        num_pipe, self.numeric_features = transformers['num']
+        cat_pipe, self.categorical_features = transformers['cat']
+
+        num_imputer = num_pipe.named_steps['imputer']
+        scaler = num_pipe.named_steps['scaler']
+        self.num_fill = np.asarray(num_imputer.statistics_, dtype=np.float64)
+        self.num_mean = scaler.mean_ if scaler.with_mean else np.zeros(len(self.numeric_features))
+        self.num_scale = scaler.scale_ if scaler.with_std else np.ones(len(self.numeric_features))
+
+        cat_imputer = cat_pipe.named_steps['imputer']
+        onehot = cat_pipe.named_steps['onehot']
+        self.cat_fill = list(cat_imputer.statistics_)
+
+        # Position de chaque modalité dans le vecteur final
+        self.cat_index = []
+        offset = len(self.numeric_features)
+        for categories in onehot.categories_:
+            self.cat_index.append({c: offset + i for i, c in enumerate(categories)})
+            offset += len(categories)
+        self.n_features = offset
+
+        # Partie texte (HashingVectorizer, sans état) : colonnes après les one-hot
+        self.text_vectorizer, self.text_feature = transformers.get('text', (None, None))
+
+        # Sortie creuse du ColumnTransformer : pour XGBoost, les zéros non stockés
+        # sont des valeurs manquantes. On reproduit ça avec des NaN.
+        self.sparse = bool(getattr(preprocessor, 'sparse_output_', False))
+        self.empty = np.nan if self.sparse else 0.0
+
+        self.booster = clf.get_booster()
+        self.missing = clf.missing if clf.missing is not None else np.nan
+        try:
+            self.iteration_range = (0, clf.best_iteration + 1)
+        except AttributeError:
+            self.iteration_range = (0, 0)
+
+    def features(self, user_input):
+        '''
+        Valeurs brutes des features numériques du modèle pour un dict (sans pandas).
+        '''
+        deadline = parse_date(user_input.get('deadline'))
+        launched = parse_date(user_input.get('launched'))
+        if launched > deadline:
+            raise ValueError(DATE_ORDER_ERROR)
+
+        goal = _float_or_nan(user_input.get('usd_goal_real'))
+        name = user_input.get('name')
+        mean_cat = self.mean_goal_by_cat.get(user_input.get('main_category'), 1)
+        mean_country = self.mean_goal_by_country.get(user_input.get('country'), 1)
+
+        return {
+            'usd_goal_real': goal,
+            'ratio_goal_by_main_category': goal / mean_cat,
+            'ratio_goal_by_country': goal / mean_country,
+            'title_word_count': len(name.split()) if isinstance(name, str) else math.nan,
+            'delta_time': (deadline - launched).days,
+        }
+
+    def transform_one(self, user_input):
+        '''
+        Ligne de features prête pour le booster (1, n_features), en float32.
+        '''
+        values = self.features(user_input)
+        row = np.full(self.n_features, self.empty, dtype=np.float64)
+
+        num = np.array([values[c] for c in self.numeric_features], dtype=np.float64)
+        num = np.where(np.isnan(num), self.num_fill, num)
+        num = (num - self.num_mean) / self.num_scale
+        if self.sparse:
+            num[num == 0] = np.nan
+        row[:len(num)] = num
+
+        for col, fill, index in zip(self.categorical_features, self.cat_fill, self.cat_index):
+            # Comme SimpleImputer : NaN est imputé, None est une modalité inconnue
+            value = user_input.get(col)
+            if isinstance(value, float) and math.isnan(value):
+                value = fill
+            pos = index.get(value)
+            if pos is not None:      # handle_unknown='ignore' : modalité inconnue -> rien
+                row[pos] = 1.0
+
+        row = row.astype(np.float32).reshape(1, -1)
+        if self.text_vectorizer is not None:
+            row = self._with_text(row, user_input)
+        return row
+
+    def _with_text(self, row, user_input):
+        '''
+        Ligne CSR : valeurs tabulaires renseignées (les NaN ne sont pas stockés) + texte hashé.
+        '''
+        from scipy import sparse
+
+        text = self.text_vectorizer.transform([_comment_text(user_input)])
+        cols = np.flatnonzero(~np.isnan(row[0]))
+        indices = np.concatenate([cols, text.indices + self.n_features])
+        data = np.concatenate([row[0, cols], text.data]).astype(np.float32)
+        return sparse.csr_matrix((data, indices, [0, len(indices)]),
+                                 shape=(1, self.n_features + text.shape[1]))
+
+    def predict_proba_one(self, user_input):
+        '''
+        Probabilité de succès d'un projet (float), identique au chemin pandas.
+        '''
+        row = self.transform_one(user_input)
+        proba = self.booster.inplace_predict(
+            row, iteration_range=self.iteration_range, missing=self.missing)
+        return float(np.asarray(proba).ravel()[-1])
+
+
+def _comment_text(user_input):
+    '''
+    Texte traité d'un projet, comme CommentText (chaîne vide sans commentaire).
+    '''
+    if 'comments_processed' in user_input:
+        processed = user_input['comments_processed']
+        return processed if isinstance(processed, str) else ''
+    raw = user_input.get('comments')
+    if not isinstance(raw, str):
+        return ''
+
+    from scripts.preprocessing import preprocess_cleaning, preprocess_nltk
+    return preprocess_nltk(preprocess_cleaning(raw))
+
+
+_scorers = {}
+
+
+def get_scorer(artifacts):
+    '''
+    Scorer compilé pour les artefacts chargés (un par version du modèle).
+    Renvoie None si le pipeline n'a pas la structure attendue : on garde alors le chemin pandas.
+    '''
+    scorer = _scorers.get(artifacts.version)
+    if scorer is None:
+        try:
+            scorer = CompiledScorer(artifacts.model, artifacts.mean_goal_by_cat,
+                                    artifacts.mean_goal_by_country)
+        except (AttributeError, KeyError, TypeError):
+            return None
+        _scorers.clear()
+        _scorers[artifacts.version] = scorer
+    return scorer
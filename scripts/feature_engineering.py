@@ -1,27 +1,106 @@
+###---------------Imports---------------###
 
-# import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
 
-# class GoalRatioEncoder:
-#     def __init__(self):
-#         self.mean_goal_by_cat = None
-#         self.mean_goal_by_country = None
+from scripts.features import add_goal_ratios, add_time_features, exact_mean, exact_sum
 
-#     def fit(self, df):
-#         self.mean_goal_by_cat = df.groupby('main_category')['usd_goal_real'].mean().to_dict()
-#         self.mean_goal_by_country = df.groupby('country')['usd_goal_real'].mean().to_dict()
 
-#     def transform(self, df):
-#         df = df.copy()
-#         df['ratio_goal_by_main_category'] = df.apply(
-#             lambda row: row['usd_goal_real'] / self.mean_goal_by_cat.get(row['maincategory'], 1),
-#             axis=1
-#         )
-#         df['ratio_goal_by_country'] = df.apply(
-#             lambda row: row['usd_goal_real'] / self.mean_goal_by_country.get(row['country'], 1),
-#             axis=1
-#         )
-#         return df
+###---------------Transformers---------------###
 
+class ProjectFeatures(BaseEstimator, TransformerMixin):
+    '''
+    Crée delta_time, practicability et title_word_count (sans état, rien à apprendre).
+    '''
 
+    def fit(self, X, y=None):
+        return self
 
-# ### drop the whole file ???????????????????????????????
+    def transform(self, X):
+        return add_time_features(X.copy())
+
+
+class GoalRatioEncoder(BaseEstimator, TransformerMixin):
+    '''
+    Apprend l'objectif moyen par main_category et par country, puis crée
+    ratio_goal_by_main_category et ratio_goal_by_country.
+
+    Les moyennes sont stockées dans le pipeline : plus besoin des pickles à part.
+    Les effectifs et les sommes exactes (exact_sum) aussi, pour pouvoir mettre les
+    moyennes à jour avec partial_fit : fit en une fois ou partial_fit bloc par bloc
+    donnent les mêmes moyennes au bit près.
+    '''
+
+    def fit(self, X, y=None):
+        # Un refit repart de zéro (moyennes, effectifs et sommes), comme un encoder neuf
+        for stat in ('mean', 'count', 'sum'):
+            for name in ('cat', 'country'):
+                if hasattr(self, f'{stat}_goal_by_{name}_'):
+                    delattr(self, f'{stat}_goal_by_{name}_')
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        '''
+        Met à jour les moyennes avec de nouvelles lignes (moyenne pondérée par les effectifs).
+
+        ValueError si l'encoder a des moyennes mais pas leurs effectifs (modèle entraîné avant
+        leur ajout) : impossible de pondérer correctement, il faut le réajuster avec fit.
+        '''
+        for name in ('cat', 'country'):
+            if hasattr(self, f'mean_goal_by_{name}_') and getattr(self, f'count_goal_by_{name}_', None) is None:
+                raise ValueError(f"GoalRatioEncoder sans effectifs (count_goal_by_{name}_) : "
+                                 "mise à jour incrémentale impossible, réajuster avec fit")
+        self._update(X, 'main_category', 'cat')
+        self._update(X, 'country', 'country')
+        return self
+
+    def _update(self, X, col, name):
+        means = dict(getattr(self, f'mean_goal_by_{name}_', {}))
+        counts = dict(getattr(self, f'count_goal_by_{name}_', {}))
+        # Encoder sans sommes exactes (entraîné avant leur ajout) : on repart de moyenne x effectif
+        sums = getattr(self, f'sum_goal_by_{name}_', None)
+        sums = dict(sums) if sums is not None else {k: exact_sum([means[k] * n]) for k, n in counts.items()}
+
+        for key, values in X.groupby(col, observed=True)['usd_goal_real']:
+            sums[key] = sums.get(key, 0) + exact_sum(values.to_numpy())
+            counts[key] = counts.get(key, 0) + len(values)
+            means[key] = exact_mean(sums[key], counts[key])
+
+        setattr(self, f'mean_goal_by_{name}_', means)
+        setattr(self, f'count_goal_by_{name}_', counts)
+        setattr(self, f'sum_goal_by_{name}_', sums)
+
+    def transform(self, X):
+        return add_goal_ratios(X.copy(), self.mean_goal_by_cat_, self.mean_goal_by_country_)
+
+
+class CommentText(BaseEstimator, TransformerMixin):
+    '''
+    Crée comments_processed (cleaning + lemmatisation, comme preprocess) à partir de la
+    colonne de commentaires bruts, pour la partie texte du modèle combiné.
+
+    Sans état. Chaque texte distinct n'est traité qu'une fois par appel (un batch de
+    prédictions partage le même traitement) ; un projet sans commentaire donne "".
+    Si comments_processed existe déjà (données d'entraînement), elle est gardée telle quelle.
+    '''
+
+    def __init__(self, column='comments'):
+        self.column = column
+
+    def fit(self, X, y=None):
+        return self
+
+    def transform(self, X):
+        X = X.copy()
+        if 'comments_processed' in X:
+            X['comments_processed'] = X['comments_processed'].fillna('')
+            return X
+        if self.column not in X:
+            X['comments_processed'] = ''
+            return X
+
+        from scripts.preprocessing import preprocess_cleaning, preprocess_nltk
+
+        raw = X[self.column]
+        processed = {text: preprocess_nltk(preprocess_cleaning(text)) for text in raw.dropna().unique()}
+        X['comments_processed'] = raw.map(processed).fillna('')
+        return X
@@ -0,0 +1,152 @@
+###---------------Imports---------------###
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from scripts.features import add_time_features
+from scripts.preprocessing import _add_ratios_and_filter, _filter_projects
+
+
+FEATURE_STORE_DIR = "save_pkl/feature_store"
+
+
+###---------------Feature store---------------###
+
+class FeatureStore:
+    '''
+    Stockage en colonnes (Parquet, une partition par ajout) des projets nettoyés,
+    avec leurs features ligne à ligne (delta_time, practicability, title_word_count).
+
+    Le manifest (manifest.json) liste les partitions et, pour chacune, le fichier
+    ids-XXXXX.npy des ID sources traités (y compris les lignes écartées par dropna) :
+    un nouvel ajout ne traite que les projets jamais vus ou dont l'état a changé.
+
+    Les ratios d'objectif dépendent des moyennes globales : ils sont recalculés à la
+    lecture (vectorisé), donc load() donne le même résultat que df_clean_create
+    sur l'ensemble des projets ajoutés (mêmes lignes, dans le même ordre).
+    '''
+
+    def __init__(self, root=FEATURE_STORE_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+
+    ###---------------Manifest---------------###
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"partitions": []}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        # Écriture atomique : un lecteur ne voit jamais un manifest à moitié écrit
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    def _files(self, key):
+        return [os.path.join(self.root, p[key]) for p in self.manifest()["partitions"]]
+
+    def covered_ids(self):
+        '''
+        ID sources déjà traités (fichiers .npy mappés en mémoire, pas de copie).
+        '''
+        ids = [np.load(path, mmap_mode="r") for path in self._files("ids")]
+        return np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+
+    def _stored_states(self):
+        '''
+        Dernier état connu de chaque projet stocké (seulement les colonnes ID et state).
+        '''
+        files = self._files("file")
+        if not files:
+            return pd.Series(dtype=object)
+        import pyarrow.parquet as pq
+        states = pd.concat([pq.read_table(f, columns=["ID", "state"]).to_pandas() for f in files])
+        return states.drop_duplicates("ID", keep="last").set_index("ID")["state"]
+
+    ###---------------Écriture---------------###
+
+    def append(self, raw, source=None):
+        '''
+        Ajoute les projets nouveaux (ID jamais vus) ou mis à jour (état différent)
+        d'un DataFrame brut au format ks-projects. Renvoie le nombre de lignes écrites.
+        '''
+        os.makedirs(self.root, exist_ok=True)
+
+        seen = np.isin(raw["ID"].to_numpy(), self.covered_ids())
+        stored = self._stored_states()
+        changed = raw["ID"].map(stored).astype(object)
+        changed = (changed.notna() & (changed != raw["state"].astype(object))).to_numpy()
+        todo = raw[~seen | changed]
+        if todo.empty:
+            print("Feature store à jour : aucun nouveau projet")
+            return 0
+
+        # Features ligne à ligne seulement (les ratios sont recalculés à la lecture)
+        features = add_time_features(_filter_projects(todo))
+        for col in features.select_dtypes("category"):
+            features[col] = features[col].astype(object)
+
+        manifest = self.manifest()
+        n = len(manifest["partitions"])
+        part_file = f"part-{n:05d}.parquet"
+        ids_file = f"ids-{n:05d}.npy"
+        features.to_parquet(os.path.join(self.root, part_file), index=False)
+        np.save(os.path.join(self.root, ids_file), todo["ID"].to_numpy(dtype=np.int64))
+
+        manifest["partitions"].append({
+            "file": part_file,
+            "ids": ids_file,
+            "rows": len(features),
+            "source_rows": len(todo),
+            "updated_rows": int(changed.sum()),
+            "source": source,
+            "created": datetime.now().isoformat(timespec="seconds"),
+        })
+        self._save_manifest(manifest)
+
+        print(f"Feature store : {len(features)} lignes ajoutées ({int(changed.sum())} mises à jour)")
+        return len(features)
+
+    ###---------------Lecture---------------###
+
+    def load(self):
+        '''
+        Table prête pour model_training_saving, identique à df_clean_create(projets ajoutés) :
+        un projet mis à jour garde sa place (ordre de premier ajout des ID), ce dont
+        dépendent le split train / test et la reproductibilité de l'entraînement.
+        Les partitions sont lues en memory-map ; la conversion vers pandas libère
+        les buffers Arrow au fur et à mesure (self_destruct) pour éviter une double copie.
+        '''
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        files = self._files("file")
+        if not files:
+            raise FileNotFoundError(f"Feature store vide : {self.root}")
+
+        table = pa.concat_tables([pq.read_table(f, memory_map=True) for f in files],
+                                 promote_options="default")
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        del table
+
+        # Un projet mis à jour apparaît dans plusieurs partitions : on garde la dernière version,
+        # remise à la place de sa première apparition
+        if len(files) > 1:
+            ids = df["ID"].to_numpy()
+            first = pd.Series(np.arange(len(ids)), index=ids)
+            first = first[~first.index.duplicated(keep="first")]
+            latest = df.drop_duplicates("ID", keep="last")
+            order = np.argsort(first[latest["ID"]].to_numpy(), kind="stable")
+            df = latest.iloc[order].reset_index(drop=True)
+
+        from scripts.feature_engineering import GoalRatioEncoder
+        encoder = GoalRatioEncoder().fit(df)
+
+        return _add_ratios_and_filter(df, encoder.mean_goal_by_cat_, encoder.mean_goal_by_country_)
@@ -0,0 +1,73 @@
+###---------------Imports---------------###
+
+# Module léger (pandas / numpy seulement) : utilisé par la prédiction sans importer sklearn
+import numpy as np
+import pandas as pd
+
+
+###---------------Functions---------------###
+
+def to_datetime(s, dayfirst=True):
+    '''
+    Parse une colonne de dates : d'abord en ISO (format du CSV Kickstarter),
+    puis les restantes en JJ/MM/AAAA (format du formulaire). Invalides -> NaT.
+    '''
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return s
+    dates = pd.to_datetime(s, format='ISO8601', errors='coerce')
+    missing = dates.isna() & s.notna()
+    if missing.any():
+        dates[missing] = pd.to_datetime(s[missing], dayfirst=dayfirst, errors='coerce')
+    return dates
+
+
+def add_time_features(X):
+    '''
+    delta_time (jours), practicability et title_word_count, sur toutes les lignes d'un coup.
+    '''
+    X['deadline'] = to_datetime(X['deadline'])
+    X['launched'] = to_datetime(X['launched'])
+    X['delta_time'] = (X['deadline'] - X['launched']).dt.days
+    X['practicability'] = X['usd_goal_real'] / X['delta_time']
+    X['title_word_count'] = X['name'].str.split().str.len()
+    return X
+
+
+def add_goal_ratios(X, mean_goal_by_cat, mean_goal_by_country):
+    '''
+    Ratio de usd_goal_real par rapport à la moyenne de sa main_category / de son country.
+    Catégorie ou pays inconnus : on divise par 1, comme dict.get(..., 1).
+    '''
+    X['ratio_goal_by_main_category'] = (
+        X['usd_goal_real'] / X['main_category'].map(mean_goal_by_cat).astype(float).fillna(1))
+    X['ratio_goal_by_country'] = (
+        X['usd_goal_real'] / X['country'].map(mean_goal_by_country).astype(float).fillna(1))
+    return X
+
+
+# Unité des sommes exactes : 2**-1126, plus petit poids d'un bit de mantisse d'un float64
+_EXACT_SHIFT = 1126
+
+
+def exact_sum(values):
+    '''
+    Somme exacte (entier Python, en unités de 2**-1126) d'un tableau de flottants finis.
+    Vectorisée : mantisses entières (53 bits, coupées en deux moitiés de 26/27 bits pour
+    ne pas déborder en int64) sommées par exposant. Les sommes de plusieurs blocs
+    s'additionnent sans erreur : le résultat ne dépend pas du découpage des données.
+    '''
+    mantissa, exponent = np.frexp(np.asarray(values, dtype=np.float64))
+    mantissa = (mantissa * 2.0 ** 53).astype(np.int64)
+    shift = exponent.astype(np.int64) - 53 + _EXACT_SHIFT
+    total = 0
+    for s in np.unique(shift):
+        m = mantissa[shift == s]
+        total += ((int((m >> 26).sum()) << 26) + int((m & (2 ** 26 - 1)).sum())) << int(s)
+    return total
+
+
+def exact_mean(total, count):
+    '''
+    Moyenne à partir d'une somme exact_sum : somme arrondie une fois en float, puis divisée.
+    '''
+    return (total / 2 ** _EXACT_SHIFT) / count
@@ -0,0 +1,161 @@
+###---------------Imports---------------###
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+###---------------Schema---------------###
+
+# Colonnes de ks-projects-201801.csv utiles au nettoyage et à l'entraînement
+PROJECT_COLUMNS = ['ID', 'name', 'main_category', 'deadline', 'launched', 'country',
+                   'usd_pledged_real', 'usd_goal_real', 'state']
+
+PROJECT_DTYPES = {
+    'ID': 'int64',
+    'name': 'object',
+    'main_category': 'category',
+    'country': 'category',
+    'state': 'category',
+    'usd_pledged_real': 'float64',
+    'usd_goal_real': 'float64',
+}
+
+# Option compact_floats : montants en float32 (moitié moins de mémoire). ~7 chiffres
+# significatifs seulement : les centimes sont perdus au-delà de ~131 000 $ et les ratios
+# d'objectif changent légèrement. Désactivé par défaut.
+COMPACT_FLOAT_DTYPES = {
+    'usd_pledged_real': 'float32',
+    'usd_goal_real': 'float32',
+}
+
+# Formats explicites des dates du fichier Kickstarter (pas d'inférence ligne à ligne)
+DATE_FORMATS = {
+    'deadline': '%Y-%m-%d',
+    'launched': '%Y-%m-%d %H:%M:%S',
+}
+
+
+###---------------Functions---------------###
+
+def memory_mb(df):
+    '''
+    Mémoire réelle du DataFrame en Mo (deep=True : compte aussi les chaînes).
+    '''
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+def parse_dates(df, formats=DATE_FORMATS):
+    '''
+    Convertit les colonnes de dates avec leur format explicite ; les valeurs
+    qui ne respectent pas le format deviennent NaT.
+
+    Toujours en datetime64[ns] : le moteur pyarrow renvoie des dates déjà converties
+    en datetime64[s], on aligne pour que les deux moteurs donnent le même DataFrame.
+    '''
+    for col, fmt in formats.items():
+        if col not in df:
+            continue
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = pd.to_datetime(df[col], format=fmt, errors='coerce')
+        if df[col].dtype != 'datetime64[ns]':
+            df[col] = df[col].astype('datetime64[ns]')
+    return df
+
+
+def optimize_dtypes(df, compact_floats=False, verbose=True):
+    '''
+    Convertit un DataFrame déjà chargé vers les types compacts (catégories, dates ;
+    float32 pour les montants avec compact_floats=True) et affiche la mémoire avant / après.
+    '''
+    before = memory_mb(df)
+
+    dtypes = {**PROJECT_DTYPES, **(COMPACT_FLOAT_DTYPES if compact_floats else {})}
+    df = df.copy()
+    for col, dtype in dtypes.items():
+        if col in df:
+            df[col] = df[col].astype(dtype)
+    df = parse_dates(df)
+
+    if verbose:
+        after = memory_mb(df)
+        print(f"Mémoire : {before:.1f} Mo -> {after:.1f} Mo (x{before / after:.1f})")
+    return df
+
+
+def load_projects(path, usecols=PROJECT_COLUMNS, engine=None, compact_floats=False, verbose=True):
+    '''
+    Lecture typée de ks-projects-201801.csv : seulement les colonnes utiles, catégories
+    pour main_category / country / state, dates au format explicite. Montants en float64
+    (float32 avec compact_floats=True, voir COMPACT_FLOAT_DTYPES pour la perte de précision).
+
+    engine='pyarrow' pour la lecture multi-thread (pyarrow doit être installé).
+    '''
+    start = time.perf_counter()
+
+    dtypes = {**PROJECT_DTYPES, **(COMPACT_FLOAT_DTYPES if compact_floats else {})}
+    dtypes = {col: dtype for col, dtype in dtypes.items() if col in usecols}
+
+    df = pd.read_csv(path, usecols=usecols, dtype=dtypes, engine=engine)
+    if engine == 'pyarrow':
+        # pyarrow suit l'ordre de usecols, le moteur C celui du fichier : on garde celui du fichier
+        header = pd.read_csv(path, nrows=0).columns
+        df = df[[col for col in header if col in df]]
+        # Chaînes manquantes : None avec pyarrow, NaN avec le moteur C
+        for col in df.select_dtypes('object'):
+            df[col] = df[col].fillna(np.nan)
+    df = parse_dates(df)
+
+    if verbose:
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f"{len(df)} projets chargés en {elapsed:.2f}s "
+              f"(fichier : {size:.1f} Mo, en mémoire : {memory_mb(df):.1f} Mo)")
+    return df
+
+
+###---------------Écriture par blocs---------------###
+
+class ChunkWriter:
+    '''
+    Écrit des DataFrames bloc par bloc dans un même fichier : CSV (en-tête au premier
+    bloc seulement) ou Parquet si le chemin finit par .parquet (pyarrow requis).
+    À utiliser comme context manager.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = str(path).endswith('.parquet')
+        self.rows = 0
+        self._started = False
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            # Le schéma du premier bloc fait foi (un bloc peut avoir une colonne toute vide)
+            table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode='a' if self._started else 'w',
+                         header=not self._started, index=False)
+        self._started = True
+        self.rows += len(chunk)
+
+    def close(self):
+        if self.parquet and self._writer is not None:
+            self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -3,33 +3,26 @@
 # Basics
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
-
-import os
-import joblib
 
 # Machine Learning
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, confusion_matrix
-import string
-import re
+from sklearn.metrics import accuracy_score, classification_report, f1_score, roc_auc_score
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
-from sklearn.model_selection import learning_curve
 
 from sklearn.naive_bayes import MultinomialNB
-from collections import Counter
 
 from sklearn.pipeline import Pipeline
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
-from xgboost import XGBClassifier
-from sklearn.pipeline import Pipeline
-from sklearn.model_selection import RandomizedSearchCV
+
+from scripts.feature_engineering import CommentText, GoalRatioEncoder, ProjectFeatures
+from scripts.registry import REGISTRY_DIR, ModelRegistry, feature_schema
+from scripts.diagnostics import DIAGNOSTICS_DIR
+from scripts.search import CHECKPOINT_DIR, make_search, run_search
+
+# xgboost et matplotlib sont importés dans les fonctions qui les utilisent
 
 
 ###---------------Functions---------------###
@@ -131,19 +124,100 @@ def model_baselines(df) :
 
     return df_final
 
-def model_training_saving(df) :
-
 
-    y = df['state'].map({'successful':1, 'failed':0})
-    X = df.drop(columns=["state"])
-
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+def model_baselines_streaming(batches, n_features=2**20, test_size=0.2, max_test_rows=200_000, random_state=42):
+    '''
+    Version hors mémoire de model_baselines : les blocs (comments_processed, state_encoded),
+    par exemple ceux de preprocessing.iter_processed_comments, sont vectorisés sans
+    vocabulaire (HashingVectorizer, float32 creux) et Naive Bayes + régression logistique
+    (SGD) apprennent en même temps, bloc par bloc (partial_fit).
+
+    La mémoire dépend de la taille d'un bloc, pas du corpus. test_size des lignes de chaque
+    bloc sont gardées de côté pour l'évaluation finale, jusqu'à max_test_rows ; ensuite
+    tous les blocs servent entièrement à l'apprentissage.
+    '''
+    from scipy import sparse
+    from sklearn.linear_model import SGDClassifier
+
+    vectorizer = build_text_vectorizer(n_features)
+
+    models = {
+        'nb': MultinomialNB(),
+        'sgd': SGDClassifier(loss='log_loss', alpha=1e-5, random_state=random_state),
+    }
+    classes = np.array([0, 1])
+    rng = np.random.default_rng(random_state)
+
+    test_X, test_y = [], []
+    n_train = n_test = 0
+    for batch in batches:
+        X = vectorizer.transform(batch['comments_processed'])
+        y = batch['state_encoded'].to_numpy()
+
+        is_test = rng.random(len(y)) < test_size
+        keep = np.flatnonzero(is_test)[:max(0, max_test_rows - n_test)]
+        if len(keep):
+            test_X.append(X[keep])
+            test_y.append(y[keep])
+            n_test += len(keep)
+
+        # Une fois max_test_rows atteint, les lignes tirées pour le test servent à l'apprentissage
+        train = np.ones(len(y), dtype=bool)
+        train[keep] = False
+        if train.any():
+            for model in models.values():
+                model.partial_fit(X[train], y[train], classes=classes)
+            n_train += int(train.sum())
+        print(f"{n_train} commentaires appris, {n_test} gardés pour le test")
+
+    if n_test:
+        X_test = sparse.vstack(test_X).tocsr()
+        y_test = np.concatenate(test_y)
+        print("\n=== NAIVE BAYES (streaming) ===")
+        print(classification_report(y_test, models['nb'].predict(X_test)))
+        print("\n=== LOGISTIC REGRESSION SGD (streaming) ===")
+        print(classification_report(y_test, models['sgd'].predict(X_test)))
+
+    return models, vectorizer
+
+
+# Colonnes utilisées par le modèle
+NUMERIC_FEATURES = ['usd_goal_real', 'ratio_goal_by_main_category', 'ratio_goal_by_country', 'title_word_count', 'delta_time']
+CATEGORICAL_FEATURES = ['main_category', 'country']
+TEXT_FEATURE = 'comments_processed'     # modèle combiné : créée par CommentText
+
+# Largeur du hashing dans le modèle combiné : le coût de prédiction XGBoost croît avec le
+# nombre de colonnes, 2**14 garde la latence proche du modèle tabulaire
+N_TEXT_FEATURES = 2**14
+
+
+def build_text_vectorizer(n_features=N_TEXT_FEATURES):
+    '''
+    Mêmes tokens et n-grammes que le TfidfVectorizer de model_baselines, mais sans
+    vocabulaire à construire ni à garder en mémoire (hashing, float32 creux).
+    '''
+    from sklearn.feature_extraction.text import HashingVectorizer
+
+    return HashingVectorizer(
+        n_features=n_features,
+        ngram_range=(1, 3),
+        lowercase=True,
+        token_pattern=r'\b[a-zA-Z][a-zA-Z]+\b',
+        alternate_sign=False,       # valeurs positives : nécessaire pour MultinomialNB
+        norm='l2',
+        dtype=np.float32
+    )
 
 
-    # Building the pipeline
-    numeric_features = ['usd_goal_real', 'ratio_goal_by_main_category', 'ratio_goal_by_country', 'title_word_count', 'delta_time']
-    categorical_features = ['main_category', 'country']
+def build_preprocessor(numeric_features=NUMERIC_FEATURES, categorical_features=CATEGORICAL_FEATURES,
+                       text_feature=None, n_text_features=N_TEXT_FEATURES):
+    '''
+    ColumnTransformer du pipeline : imputation + standardisation des numériques,
+    imputation + one-hot des catégorielles.
 
+    text_feature : colonne de texte traité ajoutée en hashing (modèle combiné). La sortie
+    reste alors toujours creuse (sparse_threshold=1) : le texte n'est jamais densifié.
+    '''
 
     num_transformer = Pipeline(
         steps = [
@@ -157,13 +231,54 @@ def model_training_saving(df) :
             ('onehot', OneHotEncoder(handle_unknown='ignore'))
         ])
 
-    preprocessor = ColumnTransformer(
-        transformers = [
-            ('num', num_transformer, numeric_features),
-            ('cat', cat_transformer, categorical_features)
-        ], remainder='drop')
+    transformers = [
+        ('num', num_transformer, numeric_features),
+        ('cat', cat_transformer, categorical_features)]
+    if text_feature is None:
+        return ColumnTransformer(transformers=transformers, remainder='drop')
+
+    # Nom de colonne seul (pas une liste) : le vectorizer reçoit une Series de textes
+    transformers.append(('text', build_text_vectorizer(n_text_features), text_feature))
+    return ColumnTransformer(transformers=transformers, remainder='drop', sparse_threshold=1.0)
+
+
+def model_training_saving(df, n_iter=10, cv=5, registry_dir=REGISTRY_DIR, promote=False, search="random",
+                          n_threads=None, cache_preprocessing=True, checkpoint_dir=CHECKPOINT_DIR, text=False) :
+    '''
+    Recherche d'hyperparamètres sur le pipeline XGBoost, enregistre le meilleur
+    modèle comme nouvelle version du registre (scripts.registry) et le renvoie.
+
+    promote : la nouvelle version devient aussi la version live (servie par predict.py).
+    search : 'random' (RandomizedSearchCV) ou 'halving' (successive halving sur
+    le nombre de lignes, les mauvais candidats sont écartés tôt).
+    n_threads : budget total de threads (défaut : KS_N_THREADS ou tous les cœurs).
+    cache_preprocessing : preprocessing ajusté une seule fois par fold (voir scripts.search).
+    checkpoint_dir : scores candidat x fold sauvegardés au fil de l'eau ; une recherche
+    interrompue reprend où elle en était (None pour désactiver).
+    text : modèle combiné, les commentaires (colonne comments, voir
+    preprocessing.add_project_comments) sont ajoutés en hashing aux features tabulaires.
+    '''
+
+    from xgboost import XGBClassifier
+
 
-    xgb_pipeline = Pipeline(steps=[
+    y = df['state'].map({'successful':1, 'failed':0}).astype(int)
+    X = df.drop(columns=["state"])
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+
+
+    # Building the pipeline
+    preprocessor = build_preprocessor(text_feature=TEXT_FEATURE if text else None)
+
+    # Les features (delta_time, ratios...) sont recréées dans le pipeline :
+    # le modèle sauvegardé contient aussi les moyennes, un seul artefact pour la prédiction
+    steps = [
+    ('features', ProjectFeatures()),
+    ('goal_ratio', GoalRatioEncoder())]
+    if text:
+        steps.append(('comments', CommentText()))
+    xgb_pipeline = Pipeline(steps=steps + [
     ('preprocessor', preprocessor),
     ('clf', XGBClassifier(
         use_label_encoder=False,    # désactive l'ancien label encoder
@@ -178,72 +293,66 @@ def model_training_saving(df) :
     'clf__subsample':       [0.7, 1.0],
     'clf__colsample_bytree':[0.7, 1.0]}
 
-    search_acc = RandomizedSearchCV(
-    xgb_pipeline, param_dist,
-    n_iter=10, cv=5, scoring='accuracy', n_jobs=-1, random_state=42)
+    # Budget de threads partagé entre les fits parallèles et XGBoost (pas de sur-souscription)
+    search_acc = make_search(
+    xgb_pipeline, param_dist, mode=search,
+    n_iter=n_iter, cv=cv, scoring='accuracy', n_threads=n_threads,
+    cache_preprocessing=cache_preprocessing, checkpoint_dir=checkpoint_dir, random_state=42)
 
-    search_acc.fit(X_train, y_train)
+    run_search(search_acc, X_train, y_train)
     print("Meilleurs paramètres :", search_acc.best_params_)
 
-    # Saving the model
-
-    now = datetime.now().strftime('%Y%m%d_%H%M%S')
-
-    # Dossier de save
-    save_dir = "save_pkl/model_pkl/"
-    os.makedirs(save_dir, exist_ok=True)  # Crée le dossier s’il n’existe pas
-
-    # Nom du fichier
-    filename = f'kickstarter_model_{now}.pkl'
-
-    # Chemin complet
-    full_path = os.path.join(save_dir, filename)
     best_model = search_acc.best_estimator_
-    joblib.dump(best_model, full_path)
-    print('Model saved !')
-
-    #
 
     y_pred  = best_model.predict(X_test)
+    y_proba = best_model.predict_proba(X_test)[:, 1]
 
     print(classification_report(y_test, y_pred))
 
-    return
+    # Saving the model : nouvelle version dans le registre (manifest, checksums, métriques)
+
+    metrics = {
+        'cv_accuracy': search_acc.best_score_,
+        'test_accuracy': accuracy_score(y_test, y_pred),
+        'test_f1': f1_score(y_test, y_pred),
+        'test_roc_auc': roc_auc_score(y_test, y_proba),
+        'n_train': len(X_train),
+        'n_test': len(X_test),
+    }
+    features = {
+        'input': feature_schema(X_train),
+        'numeric': NUMERIC_FEATURES,
+        'categorical': CATEGORICAL_FEATURES,
+    }
+    if text:
+        features['text'] = TEXT_FEATURE
+    ModelRegistry(registry_dir).register(
+        best_model, params=search_acc.best_params_, metrics=metrics, features=features,
+        source=f'search:{search}' + ('+text' if text else ''), promote=promote)
+    print('Model saved !')
+
+    return best_model
 
 ###---------------Diagnostic---------------###
 
 
-def important_words(model, vectorizer):
-        # 12. Analyse des mots les plus importants dans le modèle
-    feature_names = vectorizer.get_feature_names_out()
-    coefficients = model.coef_[0]
-
-    # Mots les plus indicatifs de succès
-    success_words = [(feature_names[i], coefficients[i])
-                    for i in coefficients.argsort()[-20:][::-1]]
-    print("\nMots les plus indicatifs de SUCCÈS:")
-    for word, coef in success_words:
-        print(f"{word}: {coef:.3f}")
+def important_words(model, vectorizer, k=20):
+    # 12. Analyse des mots les plus importants dans le modèle (top-k par sélection partielle)
+    from scripts.diagnostics import important_words as _important_words
 
-    # Mots les plus indicatifs d'échec
-    failure_words = [(feature_names[i], coefficients[i])
-                    for i in coefficients.argsort()[:20]]
-    print("\nMots les plus indicatifs d'ÉCHEC:")
-    for word, coef in failure_words:
-        print(f"{word}: {coef:.3f}")
+    return _important_words(model, vectorizer, k)
 
-    return
+def show_learning_curve(model, X_train_transformed, y_train, train_size_max, train_size_step,
+                        n_threads=None, output_path=None, cache_dir=DIAGNOSTICS_DIR, show=False):
+    '''
+    Courbe d'apprentissage (accuracy, cv=5) : fits en parallèle sous n_threads, résultats
+    gardés dans cache_dir (voir scripts.diagnostics). L'image est enregistrée dans
+    output_path (par défaut dans save_pkl/diagnostics) ; show=True ouvre aussi la fenêtre.
+    '''
+    from scripts.diagnostics import learning_curve_data, plot_learning_curve
 
-def show_learning_curve(model, X_train_transformed, y_train, train_size_max, train_size_step):
     train_sizes = np.arange(100, train_size_max, train_size_step)
 
-    # Get train scores (R2), train sizes, and validation scores using `learning_curve`
-    train_sizes, train_scores, test_scores = learning_curve(
-        estimator=model, X=X_train_transformed, y=y_train, train_sizes=train_sizes, cv=5, scoring='accuracy')
-
-    # Take the mean of cross-validated train scores and validation scores
-    train_scores_mean = np.mean(train_scores, axis=1)
-    test_scores_mean = np.mean(test_scores, axis=1)
-
-    plt.plot(train_sizes, train_scores_mean, label='Training score')
-    plt.plot(train_sizes, test_scores_mean, label='Test score')
+    curve = learning_curve_data(model, X_train_transformed, y_train, train_sizes, cv=5, scoring='accuracy',
+                                n_threads=n_threads, cache_dir=cache_dir)
+    return plot_learning_curve(curve, output_path, show=show)
@@ -1,30 +1,89 @@
+'''
+Prédictions Kickstarter sur un CSV :
+
+    python scripts/predict.py kickstarter_model.pkl new_data.csv [predictions.csv]
+    python -m scripts.predict kickstarter_model.pkl new_data.csv predictions.csv --chunksize 100000
+'''
+
+import os
 import sys
-import joblib
+import time
+import argparse
 import pandas as pd
 import numpy as np
 import math
 
+# Lancé comme fichier (python scripts/predict.py) : la racine du projet n'est pas dans sys.path
+if __name__ == '__main__' and not __package__:
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def predict_project_success(user_input: dict):
-    """
-    Prend en entrée un dictionnaire avec les infos du projet Kickstarter et renvoie la prédiction.
-    """
-    # Goal déjà atteint -- Succès garanti
-    usd_pledged = user_input.get('usd_pledged_real')  # récupère la valeur si elle existe
-    usd_goal = user_input.get('usd_goal_real')
+from scripts.artifacts import is_self_contained, load_artifacts
+from scripts.fast_predict import DATE_FORMAT_ERROR, DATE_ORDER_ERROR, get_scorer
+from scripts.prediction_cache import CACHE_ENABLED, cache_key, get_prediction_cache, normalize_input
+from scripts.ingestion import PROJECT_DTYPES, ChunkWriter
+from scripts.features import add_goal_ratios, add_time_features, to_datetime
 
-    if usd_pledged is not None and usd_goal is not None:
-        if usd_pledged >= usd_goal:
-            return "✅ Le projet est déjà financé à 100%, succès garanti 🎯"
 
-    # === 1. Charger les objets nécessaires ===
+# Types imposés à la lecture par blocs : sans eux, chaque bloc infère ses types, et un bloc
+# où une colonne texte est entièrement vide est lu en float64 (X['name'].str échoue).
+# Colonnes texte en object (pas category : les modalités différeraient d'un bloc à l'autre).
+STREAMING_DTYPES = {col: 'object' for col, dtype in PROJECT_DTYPES.items()
+                    if dtype in ('object', 'category') and col != 'state'}
+
+
+def build_features(X, mean_goal_by_cat, mean_goal_by_country):
+    '''
+    Crée les features du modèle pour toutes les lignes d'un coup (vectorisé).
+    '''
+    X = add_time_features(X)
+    return add_goal_ratios(X, mean_goal_by_cat, mean_goal_by_country)
+
+
+def _prepare(X, artifacts):
+    '''
+    Les modèles récents recréent eux-mêmes les features (ProjectFeatures + GoalRatioEncoder
+    dans le pipeline) : on ne les calcule ici que pour les anciens modèles.
+    '''
+    if is_self_contained(artifacts.model):
+        return X
+    return build_features(X, artifacts.mean_goal_by_cat, artifacts.mean_goal_by_country)
+
+
+def predict_many(df, artifacts=None, dayfirst=True):
+    '''
+    Prédit la réussite de N projets en un seul appel à predict_proba.
+
+    Renvoie un DataFrame aligné sur l'index de df avec 'proba_success' (float)
+    et 'pred_success' (0/1). Les lignes aux dates invalides (ou launched > deadline)
+    ont une probabilité NaN ; les projets déjà financés ont une probabilité de 1.
+    '''
+    if artifacts is None:
+        artifacts = load_artifacts()
+    X = df.copy()
+    X['deadline'] = to_datetime(X['deadline'], dayfirst=dayfirst)
+    X['launched'] = to_datetime(X['launched'], dayfirst=dayfirst)
+    invalid = (X['deadline'].isna() | X['launched'].isna() | (X['launched'] > X['deadline'])).to_numpy()
+
+    X = _prepare(X, artifacts)
+
+    proba = np.full(len(X), np.nan)
+    if (~invalid).any():
+        proba[~invalid] = artifacts.model.predict_proba(X[~invalid])[:, 1]
+
+    # Goal déjà atteint -- Succès garanti
+    if 'usd_pledged_real' in X:
+        funded = (X['usd_pledged_real'] >= X['usd_goal_real']).to_numpy()
+        proba[funded] = 1.0
 
-    model = joblib.load("save_pkl/model_pkl/kickstarter_model.pkl")
-    mean_goal_by_cat = joblib.load("save_pkl/mean_pkl/mean_goal_by_cat.pkl")
-    mean_goal_by_country = joblib.load("save_pkl/mean_pkl/mean_goal_by_country.pkl")
+    result = pd.DataFrame({'proba_success': proba}, index=df.index)
+    result['pred_success'] = (result['proba_success'] >= 0.5).astype(int)
+    return result
 
 
-    # === 2. Construire le DataFrame utilisateur ===
+def _predict_proba_pandas(user_input, artifacts):
+    '''
+    Chemin pandas : DataFrame d'une ligne + pipeline complet.
+    '''
     X = pd.DataFrame([user_input])
 
         # Conversion des dates au format day/month/year
@@ -32,43 +91,63 @@ def predict_project_success(user_input: dict):
         X['deadline'] = pd.to_datetime(X['deadline'], dayfirst=True, errors='raise')
         X['launched'] = pd.to_datetime(X['launched'], dayfirst=True, errors='raise')
     except Exception as e:
-        raise ValueError(f"Erreur dans le format de date. Format attendu : JJ/MM/AAAA.")
+        raise ValueError(DATE_FORMAT_ERROR)
 
       # Vérification : launched <= deadline
     if (X['launched'] > X['deadline']).any():
-        raise ValueError("Erreur : La date 'launched' ne peut pas être postérieure à 'deadline'.")
+        raise ValueError(DATE_ORDER_ERROR)
+
+    # === Clean et recréer les features ===
+    X = _prepare(X, artifacts)
+
+    # === 3.bis. Colonnes texte ===
+    # Modèle combiné (model_training_saving(text=True)) : user_input['comments'] est traité
+    # dans le pipeline (CommentText + hashing) et joint aux features tabulaires en matrice creuse.
 
-    # === Clean les features ===
-    X['delta_time'] = (X['deadline'] - X['launched']).dt.days
-    X['practicability'] = X['usd_goal_real'] / X['delta_time']
-    X['title_word_count'] = X['name'].str.split().str.len()
+    return artifacts.model.predict_proba(X)[0][1]  # colonne 1 = succès
 
 
-    # === Recréer les features ===
-    X['ratio_goal_by_main_category'] = X.apply(
-        lambda row: row['usd_goal_real'] / mean_goal_by_cat.get(row['main_category'], 1),
-        axis=1)
-    X['ratio_goal_by_country'] = X.apply(
-        lambda row: row['usd_goal_real'] / mean_goal_by_country.get(row['country'], 1),
-        axis=1)
+def predict_project_success(user_input: dict, use_cache=None):
+    """
+    Prend en entrée un dictionnaire avec les infos du projet Kickstarter et renvoie la prédiction.
+    use_cache=False pour ne pas passer par le cache des prédictions (par défaut : KS_PREDICTION_CACHE).
+    """
+    # Goal déjà atteint -- Succès garanti
+    usd_pledged = user_input.get('usd_pledged_real')  # récupère la valeur si elle existe
+    usd_goal = user_input.get('usd_goal_real')
+
+    if usd_pledged is not None and usd_goal is not None:
+        if usd_pledged >= usd_goal:
+            return "✅ Le projet est déjà financé à 100%, succès garanti 🎯"
 
-    # === 3.bis. Transformer les colonnes texte ===
-    # df['comments_cleaned'] = df['comments'].apply(preprocess_text)  # À définir si pas encore fait
+    # === 1. Charger les objets nécessaires ===
+    # Chargés une seule fois par process (cache), rechargés si le fichier du modèle change
 
-    # X_text = vectorizer.transform(df['comments_cleaned'])
+    artifacts = load_artifacts()
 
+    # === 2. Cache des prédictions (clé : projet normalisé + version du modèle) ===
 
-    # Tu dois les encoder comme dans ton entraînement (OneHotEncoder ou OrdinalEncoder)
-    # Ici, on suppose que tu as tout préparé avant pour les features finales
-    # Exemple :
-    # X_final = hstack([X_text, encoded_features])
+    if use_cache is None:
+        use_cache = CACHE_ENABLED
+    project = normalize_input(user_input, artifacts.mean_goal_by_cat, artifacts.mean_goal_by_country)
+    if use_cache:
+        key = cache_key(project, artifacts.version)
+        proba_success = get_prediction_cache().get(key)
+    else:
+        proba_success = None
 
-    # Si ton modèle ne prend que le texte :
-    # X_final = X_text
+    # === 3. Prédiction ===
+    # Chemin rapide (scorer compilé : NumPy + booster, sans pandas), sinon chemin pandas
 
-    # === 4. Prédiction ===
+    if proba_success is None:
+        scorer = get_scorer(artifacts)
+        if scorer is not None:
+            proba_success = scorer.predict_proba_one(project)
+        else:
+            proba_success = _predict_proba_pandas(project, artifacts)
+        if use_cache:
+            get_prediction_cache().set(key, proba_success)
 
-    proba_success = model.predict_proba(X)[0][1]  # colonne 1 = succès
     proba_percent = round(proba_success * 100, 2)
 
     if proba_success >= 0.5:
@@ -80,25 +159,85 @@ def predict_project_success(user_input: dict):
 
 
 
-# def main(model_path, data_path):
-#     # 1. Charger le modèle
-#     model = joblib.load(model_path)
-
-#     # 2. Charger de nouvelles données (mêmes colonnes qu’à l’entraînement)
-#     X = pd.read_csv(data_path)
-
-#     # 3. Faire la prédiction
-#     preds = model.predict(df)
-#     proba = model.predict_proba(df)[:,1]
-
-#     # 4. Afficher ou enregistrer
-#     df['pred_success'] = preds
-#     df['proba_success'] = proba
-#     print(df[['pred_success','proba_success']])
-#     # ou df.to_csv('predictions.csv', index=False)
-
-# if __name__ == '__main__':
-#     if len(sys.argv) != 3:
-#         print("Usage: python predict.py kickstarter_model.pkl new_data.csv")
-#     else:
-#         main(sys.argv[1], sys.argv[2])
+def _peak_rss_mb():
+    '''
+    Pic de mémoire résidente du process en Mo (None si indisponible, ex. Windows).
+    '''
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux : Ko, macOS : octets
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+def predict_csv_streaming(data_path, output_path, chunksize=50_000, artifacts=None):
+    '''
+    Score un gros CSV par blocs de chunksize lignes et écrit les prédictions au fur
+    et à mesure (CSV, ou Parquet si output_path finit par .parquet).
+    La mémoire reste bornée par la taille d'un bloc, quelle que soit la taille du fichier.
+    '''
+    if artifacts is None:
+        artifacts = load_artifacts()
+
+    n_rows = 0
+    start = time.perf_counter()
+
+    with ChunkWriter(output_path) as writer:
+        for chunk in pd.read_csv(data_path, chunksize=chunksize, dtype=STREAMING_DTYPES):
+            writer.write(chunk.join(predict_many(chunk, artifacts=artifacts)))
+            n_rows += len(chunk)
+
+    elapsed = time.perf_counter() - start
+    report = {
+        'rows': n_rows,
+        'seconds': round(elapsed, 2),
+        'rows_per_second': round(n_rows / elapsed, 1) if elapsed > 0 else None,
+        'peak_rss_mb': _peak_rss_mb(),
+    }
+    print(f"{n_rows} lignes scorées en {elapsed:.1f}s ({report['rows_per_second']} lignes/s)")
+    if report['peak_rss_mb'] is not None:
+        print(f"Pic de mémoire (RSS) : {report['peak_rss_mb']:.0f} Mo")
+    return report
+
+
+def main(model_path, data_path, output_path=None):
+    '''
+    Score toutes les lignes d'un CSV en un seul appel à predict_proba.
+    '''
+    # 1. Charger le modèle et les moyennes (une seule fois)
+    artifacts = load_artifacts(model_path=model_path)
+
+    # 2. Charger de nouvelles données (mêmes colonnes qu'à l'entraînement)
+    df = pd.read_csv(data_path)
+
+    # 3. Faire la prédiction
+    preds = predict_many(df, artifacts=artifacts)
+
+    # 4. Afficher ou enregistrer
+    df = df.join(preds)
+    if output_path:
+        df.to_csv(output_path, index=False)
+        print(f"{len(df)} prédictions enregistrées dans {output_path}")
+    else:
+        print(df[['pred_success', 'proba_success']])
+
+    return df
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Prédictions Kickstarter sur un CSV")
+    parser.add_argument('model_path')
+    parser.add_argument('data_path')
+    parser.add_argument('output_path', nargs='?')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="Mode streaming : score le fichier par blocs (output_path obligatoire)")
+    args = parser.parse_args()
+
+    if args.chunksize:
+        if not args.output_path:
+            parser.error("le mode --chunksize nécessite output_path")
+        predict_csv_streaming(args.data_path, args.output_path, args.chunksize,
+                              artifacts=load_artifacts(model_path=args.model_path))
+    else:
+        main(args.model_path, args.data_path, args.output_path)
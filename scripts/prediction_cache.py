@@ -0,0 +1,132 @@
+###---------------Imports---------------###
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from scripts.fast_predict import parse_date
+
+
+# KS_PREDICTION_CACHE=0 désactive le cache pour tout le process
+CACHE_ENABLED = os.environ.get("KS_PREDICTION_CACHE", "1") != "0"
+CACHE_MAXSIZE = int(os.environ.get("KS_PREDICTION_CACHE_SIZE", 10_000))
+CACHE_TTL = float(os.environ.get("KS_PREDICTION_CACHE_TTL", 3600))
+
+
+###---------------Normalisation---------------###
+
+def _match_known(value, known):
+    '''
+    Remet une modalité dans la casse connue du modèle (' games ' -> 'Games').
+    '''
+    if not isinstance(value, str):
+        return value
+    value = value.strip()
+    if value in known:
+        return value
+    lower = {k.lower(): k for k in known if isinstance(k, str)}
+    return lower.get(value.lower(), value)
+
+
+def normalize_input(user_input, mean_goal_by_cat=(), mean_goal_by_country=()):
+    '''
+    Forme canonique d'un projet : dates parsées, catégorie / pays normalisés,
+    titre sans espaces superflus. C'est cette forme qui est scorée et mise en cache.
+    '''
+    project = dict(user_input)
+    project['deadline'] = parse_date(project.get('deadline'))
+    project['launched'] = parse_date(project.get('launched'))
+
+    name = project.get('name')
+    if isinstance(name, str):
+        project['name'] = ' '.join(name.split())
+
+    country = project.get('country')
+    if isinstance(country, str):
+        project['country'] = _match_known(country.upper(), mean_goal_by_country)
+    project['main_category'] = _match_known(project.get('main_category'), mean_goal_by_cat)
+
+    for col in ('usd_goal_real', 'usd_pledged_real'):
+        if project.get(col) is not None:
+            project[col] = float(project[col])
+
+    return project
+
+
+def cache_key(project, model_version):
+    '''
+    Hash canonique d'un projet normalisé + version du modèle : changer de modèle
+    invalide automatiquement toutes les entrées.
+    '''
+    payload = json.dumps(project, sort_keys=True, default=str)
+    return hashlib.sha1(f"{model_version}|{payload}".encode()).hexdigest()
+
+
+###---------------Cache---------------###
+
+class PredictionCache:
+    '''
+    Cache LRU avec durée de vie (TTL) pour les probabilités prédites.
+    '''
+
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Cache unique pour tout le process
+_cache = PredictionCache()
+
+
+def get_prediction_cache():
+    return _cache
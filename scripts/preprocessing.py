@@ -3,39 +3,39 @@
 # Basics
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import pandas as pd
-
+import os
+import re
+from functools import lru_cache
 
-import joblib
-from pathlib import Path
+from scripts.features import add_goal_ratios, add_time_features, to_datetime
+from scripts.ingestion import ChunkWriter
 
-# Machine Learning
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import classification_report, confusion_matrix
-import string
-import re
-import nltk
-from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.naive_bayes import MultinomialNB
-from collections import Counter
+# Les imports lourds (sklearn, nltk) se font dans les fonctions qui s'en servent :
+# importer ce module reste rapide.
 
 
 ###---------------Functions---------------###
 
-def df_create_state_comments(url1,url2):
+def df_create_state_comments(url1,url2, chunksize=None, output_path=None):
+    '''
+    Commentaires (url1) joints à l'état final de leur projet (url2), seulement
+    successful / failed.
+
+    chunksize : mode streaming, le fichier de commentaires est lu par blocs et joint à
+    un index compact ID -> état (voir iter_state_comments) : la mémoire reste bornée
+    par l'index plus un bloc. Avec output_path (CSV ou .parquet), les lignes sont
+    écrites au fur et à mesure et la fonction renvoie le nombre de lignes écrites.
+    '''
+
+    if chunksize is not None:
+        return _state_comments_streaming(url1, url2, chunksize, output_path)
 
     # Importing clean the two datasets
 
     print("Étape 1 : Lecture des fichiers CSV...")
 
     df_comments = pd.read_csv(url1)
-    df_comments = df_comments[df_comments['comments'].apply(lambda x: len(x) > 2)]  #dropping the empty [] comments
+    df_comments = df_comments[df_comments['comments'].str.len() > 2]  #dropping the empty [] comments
 
     df_projects = pd.read_csv(url2)
     df_projects = df_projects.dropna(subset=['name'])
@@ -53,11 +53,98 @@ def df_create_state_comments(url1,url2):
 
     print("Étape finale : Dataset ready avec ", len(df_merged), "lignes.")
 
+    if output_path is not None:
+        with ChunkWriter(output_path) as writer:
+            writer.write(df_merged)
+
     return df_merged
 
-def df_clean_create(df):
+
+# États gardés pour l'analyse des commentaires (codes de l'index ID -> état)
+COMMENT_STATES = np.array(['failed', 'successful'], dtype=object)
+
+
+def project_state_index(url2, chunksize=500_000):
     '''
-    Create the adequate df with all the necessary features for a futur model training
+    Index compact ID -> état des projets terminés (failed / successful) avec un titre :
+    IDs triés (int64) et codes d'état (int8, voir COMMENT_STATES). Le fichier projets
+    est lu par blocs, seulement les colonnes ID, name et state.
+    '''
+    ids, codes = [], []
+    for chunk in pd.read_csv(url2, usecols=['ID', 'name', 'state'], chunksize=chunksize):
+        chunk = chunk[chunk['name'].notna() & chunk['state'].isin(COMMENT_STATES)]
+        ids.append(chunk['ID'].to_numpy(dtype=np.int64))
+        codes.append((chunk['state'] == 'successful').to_numpy(dtype=np.int8))
+
+    ids = np.concatenate(ids) if ids else np.array([], dtype=np.int64)
+    codes = np.concatenate(codes) if codes else np.array([], dtype=np.int8)
+    order = np.argsort(ids, kind='stable')
+    return ids[order], codes[order]
+
+
+def iter_state_comments(url1, url2, chunksize=100_000, index=None):
+    '''
+    Générateur de blocs (ID, state, comments...) : le fichier de commentaires est lu
+    par blocs, les listes vides ('[]') sont écartées et chaque bloc est joint à
+    l'index ID -> état par recherche dichotomique (pas de pd.merge).
+    '''
+    ids, codes = index if index is not None else project_state_index(url2)
+
+    for chunk in pd.read_csv(url1, chunksize=chunksize):
+        chunk = chunk[chunk['comments'].str.len() > 2]  #dropping the empty [] comments
+        if chunk.empty or len(ids) == 0:
+            continue
+
+        chunk_ids = chunk['id'].to_numpy(dtype=np.int64)
+        pos = np.searchsorted(ids, chunk_ids).clip(max=len(ids) - 1)
+        found = ids[pos] == chunk_ids
+        if not found.any():
+            continue
+
+        merged = chunk[found].drop(columns=['id'])
+        merged.insert(0, 'state', COMMENT_STATES[codes[pos[found]]])
+        merged.insert(0, 'ID', chunk_ids[found])
+        yield merged.reset_index(drop=True)
+
+
+def _state_comments_streaming(url1, url2, chunksize, output_path):
+
+    print("Étape 1 : Index ID -> état des projets...")
+    index = project_state_index(url2)
+    print(f"{len(index[0])} projets terminés indexés")
+
+    print("Étape 2 : Jointure des commentaires par blocs...")
+    counts = pd.Series(0, index=COMMENT_STATES)
+    chunks = []
+    writer = ChunkWriter(output_path) if output_path is not None else None
+    try:
+        for merged in iter_state_comments(url1, url2, chunksize=chunksize, index=index):
+            counts = counts.add(merged['state'].value_counts(), fill_value=0)
+            if writer is not None:
+                writer.write(merged)
+            else:
+                chunks.append(merged)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    counts = counts.astype(int).sort_values(ascending=False).rename('count')
+    counts.index.name = 'state'
+    print("Distribution des classes:")
+    print(counts)
+    print((counts / counts.sum()).rename('proportion'))
+
+    if writer is not None:
+        print(f"Étape finale : {writer.rows} lignes écrites dans {output_path}")
+        return writer.rows
+
+    df_merged = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=['ID', 'state', 'comments'])
+    print("Étape finale : Dataset ready avec ", len(df_merged), "lignes.")
+    return df_merged
+
+def _filter_projects(df):
+    '''
+    Colonnes utiles, dates en datetime et suppression des lignes incomplètes.
     '''
 
     # Keeping only the variables of interest
@@ -65,46 +152,37 @@ def df_clean_create(df):
     filter = ['ID', 'name', 'main_category', 'deadline', 'launched', 'country',
           'usd_pledged_real', 'usd_goal_real', 'state']
 
-    df_filtered = df[filter]
+    df_filtered = df[filter].copy()
 
     # Converting the dates into datatime
 
-    df_filtered['deadline'] = pd.to_datetime(df_filtered['deadline'])
-    df_filtered['launched'] = pd.to_datetime(df_filtered['launched'])
-    df_filtered = df_filtered.dropna()
-
-    # Creating the delta time feature
-    df_filtered['delta_time'] = df_filtered['deadline'] - df_filtered['launched']
-    df_filtered['delta_time'] = df_filtered['delta_time'].dt.days
+    # (déjà en datetime si le fichier a été lu avec ingestion.load_projects)
+    df_filtered['deadline'] = to_datetime(df_filtered['deadline'])
+    df_filtered['launched'] = to_datetime(df_filtered['launched'])
+    return df_filtered.dropna()
 
-    # Creating the practicability feature
-    df_filtered['practicability'] = df_filtered['usd_goal_real'] / df_filtered['delta_time']
-
-
-    # Creating the mean goal dicts
-    mean_goal_by_cat = df_filtered.groupby('main_category')['usd_goal_real'].mean().to_dict()
-    mean_goal_by_country = df_filtered.groupby('country')['usd_goal_real'].mean().to_dict()
 
+def _create_features(df_filtered, mean_goal_by_cat, mean_goal_by_country):
+    '''
+    Features à partir des moyennes d'objectif déjà calculées, puis filtre sur l'état.
+    '''
 
-    # Sauvegarde les means
+    # Creating delta_time, practicability and title_word_count
+    df_filtered = add_time_features(df_filtered)
 
-        # Créer le dossier s'il n'existe pas
-    save_dir = Path('save_pkl/mean_pkl')
-    save_dir.mkdir(parents=True, exist_ok=True)
+    return _add_ratios_and_filter(df_filtered, mean_goal_by_cat, mean_goal_by_country)
 
-        # Sauvegarder chaque dictionnaire dans un fichier différent
-    joblib.dump(mean_goal_by_cat, save_dir / 'mean_goal_by_cat.pkl')
-    joblib.dump(mean_goal_by_country, save_dir / 'mean_goal_by_country.pkl')
 
+def _add_ratios_and_filter(df_filtered, mean_goal_by_cat, mean_goal_by_country):
+    '''
+    Ratios d'objectif (features qui dépendent de tout le dataset) et filtre sur l'état.
+    '''
 
-    # Creating the columns ratio from the mean dicts
-    df_filtered['ratio_goal_by_main_category'] = df_filtered.apply(
-        lambda row: row['usd_goal_real'] / mean_goal_by_cat.get(row['main_category'], 1), axis=1)
-    df_filtered['ratio_goal_by_country'] = df_filtered.apply(
-        lambda row: row['usd_goal_real'] / mean_goal_by_country.get(row['country'], 1), axis=1)
+    # Creating the columns ratio from the mean goals (vectorisé, mêmes calculs que dans le pipeline)
+    df_filtered = add_goal_ratios(df_filtered, mean_goal_by_cat, mean_goal_by_country)
 
-    # Longueur du titre : nombre de mots
-    df_filtered['title_word_count'] = df_filtered['name'].str.split().str.len()
+    # Longueur du titre en dernière colonne, comme avant
+    df_filtered['title_word_count'] = df_filtered.pop('title_word_count')
 
     # Keeping the only two valid state
     df_final = df_filtered[df_filtered['state'].isin(['failed', 'successful'])]
@@ -112,22 +190,96 @@ def df_clean_create(df):
     return df_final
 
 
+def df_clean_create(df):
+    '''
+    Create the adequate df with all the necessary features for a futur model training
+    '''
+    from scripts.feature_engineering import GoalRatioEncoder
+
+    df_filtered = _filter_projects(df)
+
+    # Mean goal dicts (mêmes calculs que le GoalRatioEncoder du pipeline)
+    encoder = GoalRatioEncoder().fit(df_filtered)
+
+    return _create_features(df_filtered, encoder.mean_goal_by_cat_, encoder.mean_goal_by_country_)
+
+
+def df_clean_create_chunked(path, output_path, chunksize=200_000, dtype=None, return_encoder=False):
+    '''
+    Version hors mémoire de df_clean_create, pour des fichiers plus gros que la RAM.
+
+    Passe 1 : on lit le CSV par blocs et on met à jour un GoalRatioEncoder avec chaque
+    bloc (partial_fit : sommes exactes et effectifs par main_category et par country).
+    Passe 2 : on relit les blocs, on crée les features avec ces moyennes et on écrit
+    le résultat au fur et à mesure dans output_path (CSV ou .parquet).
+
+    Même résultat que df_clean_create(pd.read_csv(path)), au bit près (moyennes calculées
+    sur des sommes exactes, indépendantes du découpage). La mémoire reste bornée par la
+    taille d'un bloc.
+
+    Renvoie (mean_goal_by_cat, mean_goal_by_country) ; avec return_encoder=True, aussi
+    le GoalRatioEncoder ajusté (effectifs inclus, pour update_model).
+    '''
+    from scripts.feature_engineering import GoalRatioEncoder
+
+    columns = ['ID', 'name', 'main_category', 'deadline', 'launched', 'country',
+               'usd_pledged_real', 'usd_goal_real', 'state']
+
+    def chunks():
+        return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+    # Passe 1 : moyennes par catégorie / pays, mises à jour bloc par bloc
+    print("Passe 1 : calcul des moyennes d'objectif...")
+    encoder = GoalRatioEncoder()
+    for chunk in chunks():
+        encoder.partial_fit(_filter_projects(chunk))
+    mean_goal_by_cat = getattr(encoder, 'mean_goal_by_cat_', {})
+    mean_goal_by_country = getattr(encoder, 'mean_goal_by_country_', {})
+
+    # Passe 2 : features bloc par bloc, écrites sur disque
+    print("Passe 2 : création des features...")
+    n_in = 0
+    with ChunkWriter(output_path) as writer:
+        for chunk in chunks():
+            n_in += len(chunk)
+            writer.write(_create_features(_filter_projects(chunk), mean_goal_by_cat, mean_goal_by_country))
+
+    print(f"Étape finale : {writer.rows} lignes sur {n_in} écrites dans {output_path}")
+    if return_encoder:
+        return mean_goal_by_cat, mean_goal_by_country, encoder
+    return mean_goal_by_cat, mean_goal_by_country
+
+
 
 
 ###---------------Preprocessing for the commenst---------------###
 
 # Fonction finale
-def preprocess(df):
+def preprocess(df, n_jobs=1, cache=None):
     '''
     Fonction finale regroupant les differentes fonctions de preprocessing
+
+    n_jobs > 1 (ou -1 pour tous les cœurs) : les commentaires sont découpés en blocs
+    traités en parallèle par un pool de process. Le résultat est identique.
+
+    cache : CommentCache (ou True pour le cache par défaut dans save_pkl/) ; seuls les
+    commentaires absents du cache sont traités.
     '''
 
-    print('Application du cleaning...')
-    df['comments_clean'] = df['comments'].apply(preprocess_cleaning)
+    if cache is not None and cache is not False:
+        print('Application du cleaning + nltk (avec cache)...')
+        df['comments_processed'] = preprocess_cached(df['comments'], cache, n_jobs=n_jobs)
+    elif n_jobs == 1:
+        print('Application du cleaning...')
+        df['comments_clean'] = df['comments'].apply(preprocess_cleaning)
 
-    print('Application du nltk')
-    df['comments_processed'] = df['comments_clean'].apply(preprocess_nltk)
+        print('Application du nltk')
+        df['comments_processed'] = df['comments_clean'].apply(preprocess_nltk)
+    else:
+        print('Application du cleaning + nltk en parallèle...')
+        df['comments_processed'] = preprocess_parallel(df['comments'], n_jobs=n_jobs)
 
+    from sklearn.preprocessing import LabelEncoder
     label_encoder = LabelEncoder()
     df['state_encoded'] = label_encoder.fit_transform(df['state'])
     print(f"Classes encodées: {label_encoder.classes_}")
@@ -135,6 +287,18 @@ def preprocess(df):
     return df[['comments_processed', 'state_encoded']]
 
 
+# À incrémenter à chaque changement de preprocess_cleaning / preprocess_nltk :
+# les entrées du cache disque des commentaires traités avec l'ancienne version sont ignorées
+PREPROCESS_VERSION = 1
+
+# Regex compilées une seule fois
+_PUNCTUATION_RE = re.compile(r'[^\w\s!?-]')
+_SPACES_RE = re.compile(r'\s+')
+
+# Taille max du cache token -> lemme (le vocabulaire des commentaires se répète beaucoup)
+LEMMA_CACHE_SIZE = 200_000
+
+
 def preprocess_cleaning(sentence):
     '''
         Cleaning the text and doing the Basics
@@ -147,26 +311,141 @@ def preprocess_cleaning(sentence):
 
     # IMPORTANT pour sentiment: garder ! et ? qui indiquent l'intensité émotionnelle
     # Garder aussi les - pour des mots comme "well-executed"
-    sentence = re.sub(r'[^\w\s!?-]', ' ', sentence)
+    sentence = _PUNCTUATION_RE.sub(' ', sentence)
 
     # Garder les chiffres sous forme de token car "10/10" ou "5 stars" sont importants
     # sentence = re.sub(r'\b\d+\b', ' NUMBER ', sentence)
 
     # Nettoyer les espaces multiples mais garder ! et ?
-    sentence = re.sub(r'\s+', ' ', sentence).strip()
+    sentence = _SPACES_RE.sub(' ', sentence).strip()
 
     return sentence
 
 
+@lru_cache(maxsize=1)
+def _lemmatizer():
+    # Un seul lemmatizer par process
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+
+@lru_cache(maxsize=LEMMA_CACHE_SIZE)
+def _lemmatize(token):
+    return _lemmatizer().lemmatize(token)
+
+
 def preprocess_nltk(text):
     '''
         Lemmatisation (optionnel, souvent TF-IDF suffit)
     '''
 
-    lemmatizer = WordNetLemmatizer()
+    from nltk.tokenize import word_tokenize
 
     if not text:
         return ""
     tokens = word_tokenize(text)
-    lemmas = [lemmatizer.lemmatize(token) for token in tokens if len(token) > 1]
+    lemmas = [_lemmatize(token) for token in tokens if len(token) > 1]
     return ' '.join(lemmas)
+
+
+def _preprocess_shard(comments):
+    '''
+    Cleaning + nltk sur un bloc de commentaires (exécuté dans un process du pool).
+    '''
+    return [preprocess_nltk(preprocess_cleaning(c)) for c in comments]
+
+
+def preprocess_parallel(comments, n_jobs=-1, shards_per_job=4):
+    '''
+    preprocess_cleaning + preprocess_nltk sur une Series de commentaires, réparti sur
+    n_jobs process. Chaque process garde son lemmatizer et son cache de lemmes.
+    Renvoie une Series alignée sur l'index d'entrée.
+    '''
+    from concurrent.futures import ProcessPoolExecutor
+
+    if n_jobs is None or n_jobs < 1:
+        n_jobs = os.cpu_count() or 1
+    values = comments.tolist()
+    n_shards = max(1, min(len(values), n_jobs * shards_per_job))
+    bounds = np.linspace(0, len(values), n_shards + 1).astype(int)
+    shards = [values[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        results = pool.map(_preprocess_shard, shards)
+        processed = [text for shard in results for text in shard]
+
+    return pd.Series(processed, index=comments.index)
+
+
+def preprocess_cached(comments, cache=True, n_jobs=1):
+    '''
+    preprocess_cleaning + preprocess_nltk sur une Series de commentaires, en passant par
+    le cache disque (clé : texte brut + PREPROCESS_VERSION). Les commentaires en double
+    ne sont traités qu'une fois. Renvoie une Series alignée sur l'index d'entrée.
+    '''
+    from scripts.comment_cache import CommentCache, comment_key
+
+    if cache is True:
+        cache = CommentCache()
+
+    values = comments.tolist()
+    keys = [None if pd.isna(v) else comment_key(v, PREPROCESS_VERSION) for v in values]
+    found = cache.get_many(k for k in keys if k is not None)
+
+    # Commentaires à traiter : absents du cache, une seule fois chacun
+    todo = {}
+    for key, value in zip(keys, values):
+        if key is not None and key not in found:
+            todo.setdefault(key, value)
+
+    if todo:
+        if n_jobs == 1:
+            processed = _preprocess_shard(todo.values())
+        else:
+            processed = preprocess_parallel(pd.Series(list(todo.values())), n_jobs=n_jobs).tolist()
+        new = dict(zip(todo, processed))
+        cache.put_many(new)
+        found.update(new)
+
+    cache.report()
+    return pd.Series(["" if key is None else found[key] for key in keys], index=comments.index)
+
+
+def iter_processed_comments(url1, url2, chunksize=100_000, cache=None, n_jobs=1):
+    '''
+    Blocs (comments_processed, state_encoded) prêts pour l'entraînement en streaming :
+    jointure par blocs (iter_state_comments) puis cleaning + nltk, via le cache disque
+    des commentaires si cache est fourni (CommentCache ou True).
+
+    state_encoded : failed=0, successful=1, comme le LabelEncoder de preprocess (mais
+    sans dépendre des classes présentes dans le bloc).
+    '''
+    if cache is True:
+        from scripts.comment_cache import CommentCache
+        cache = CommentCache()
+
+    for merged in iter_state_comments(url1, url2, chunksize=chunksize):
+        if cache is not None and cache is not False:
+            processed = preprocess_cached(merged['comments'], cache, n_jobs=n_jobs)
+        elif n_jobs == 1:
+            processed = merged['comments'].apply(preprocess_cleaning).apply(preprocess_nltk)
+        else:
+            processed = preprocess_parallel(merged['comments'], n_jobs=n_jobs)
+
+        yield pd.DataFrame({
+            'comments_processed': processed,
+            'state_encoded': (merged['state'] == 'successful').astype(int),
+        })
+
+
+def add_project_comments(df, url1):
+    '''
+    Ajoute à des projets (colonne ID) leurs commentaires bruts (fichier url1 : id, comments),
+    pour entraîner le modèle combiné texte + tabulaire. Les projets sans commentaire
+    gardent comments = NaN (partie texte vide).
+    '''
+    df_comments = pd.read_csv(url1, usecols=['id', 'comments'])
+    df_comments = df_comments[df_comments['comments'].str.len() > 2]  #dropping the empty [] comments
+    df_comments = df_comments.drop_duplicates(subset='id').rename(columns={'id': 'ID'})
+
+    return df.drop(columns=['comments'], errors='ignore').merge(df_comments, on='ID', how='left')
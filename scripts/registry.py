@@ -0,0 +1,252 @@
+'''
+Registre des modèles : une version par entraînement / mise à jour, un manifest
+(paramètres, métriques, schéma des features, sommes de contrôle) et une version
+"live" servie par predict.py et l'API.
+
+    python -m scripts.registry list
+    python -m scripts.registry show v0003
+    python -m scripts.registry promote v0003
+    python -m scripts.registry verify v0003
+'''
+
+###---------------Imports---------------###
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+
+
+REGISTRY_DIR = "save_pkl/model_registry"
+
+PIPELINE_FILE = "pipeline.joblib"
+BOOSTER_FILE = "booster.ubj"
+
+
+###---------------Helpers---------------###
+
+def _sha256(path, block_size=1 << 20):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _jsonable(value):
+    '''
+    Valeurs numpy -> types Python, le reste en texte si JSON ne sait pas l'écrire.
+    '''
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, "item"):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def feature_schema(X):
+    '''
+    Colonnes d'entrée attendues par le pipeline et leur type.
+    '''
+    return {col: str(dtype) for col, dtype in X.dtypes.items()}
+
+
+###---------------Registre---------------###
+
+class ModelRegistry:
+    '''
+    Dossier root/ avec manifest.json et un sous-dossier par version :
+
+    - pipeline.joblib : le pipeline sans les arbres (clf non ajusté), rechargé en
+      mmap_mode='r' (les tableaux numpy sont partagés entre process) ;
+    - booster.ubj : le booster XGBoost au format natif UBJSON, rechargé sans pickle.
+
+    Le manifest est réécrit de façon atomique (fichier temporaire + os.replace) sous
+    un verrou fichier ; "promote" ne fait que changer la version live du manifest,
+    après vérification des sommes de contrôle.
+    '''
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+
+    ###---------------Manifest---------------###
+
+    def manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"live": None, "versions": {}, "history": []}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest):
+        tmp = self.manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, self.manifest_path)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        '''
+        Verrou exclusif sur le registre (lecture-modification-écriture du manifest).
+        '''
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".lock"), "w") as lock:
+            try:
+                import fcntl
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            except ImportError:   # Windows : pas de verrou
+                pass
+            yield
+
+    def versions(self):
+        return self.manifest()["versions"]
+
+    def live(self):
+        return self.manifest()["live"]
+
+    def _next_version(self, manifest):
+        numbers = [int(v[1:]) for v in manifest["versions"]]
+        return f"v{max(numbers, default=0) + 1:04d}"
+
+    ###---------------Écriture---------------###
+
+    def register(self, model, params=None, metrics=None, features=None, source=None, parent=None,
+                 promote=False):
+        '''
+        Enregistre un pipeline (dernière étape : XGBClassifier ajusté) comme nouvelle
+        version et renvoie son nom. promote=True en fait aussi la version live.
+        '''
+        import joblib
+        from sklearn.base import clone
+
+        clf = model.steps[-1][1]
+        skeleton = clone(model)
+        for name, step in model.steps[:-1]:
+            skeleton.set_params(**{name: step})
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            joblib.dump(skeleton, os.path.join(tmp_dir, PIPELINE_FILE))
+            clf.get_booster().save_model(os.path.join(tmp_dir, BOOSTER_FILE))
+            files = {
+                name: {"sha256": _sha256(os.path.join(tmp_dir, name)),
+                       "size": os.path.getsize(os.path.join(tmp_dir, name))}
+                for name in (PIPELINE_FILE, BOOSTER_FILE)
+            }
+
+            with self._locked():
+                manifest = self.manifest()
+                version = self._next_version(manifest)
+                os.replace(tmp_dir, os.path.join(self.root, version))
+                manifest["versions"][version] = {
+                    "created": datetime.now().isoformat(timespec="seconds"),
+                    "source": source,
+                    "parent": parent,
+                    "params": _jsonable(params or {}),
+                    "metrics": _jsonable(metrics or {}),
+                    "features": _jsonable(features or {}),
+                    "files": files,
+                    "size": sum(f["size"] for f in files.values()),
+                }
+                self._save_manifest(manifest)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        print(f"Modèle enregistré : {version} ({self.root})")
+        if promote:
+            self.promote(version)
+        return version
+
+    def verify(self, version):
+        '''
+        Vérifie taille et sha256 des fichiers d'une version ; ValueError si un fichier ne correspond pas.
+        '''
+        entry = self.versions().get(version)
+        if entry is None:
+            raise KeyError(f"Version inconnue : {version}")
+        for name, expected in entry["files"].items():
+            path = os.path.join(self.root, version, name)
+            if not os.path.exists(path):
+                raise ValueError(f"{version} : fichier manquant {name}")
+            if os.path.getsize(path) != expected["size"] or _sha256(path) != expected["sha256"]:
+                raise ValueError(f"{version} : somme de contrôle invalide pour {name}")
+        return True
+
+    def promote(self, version):
+        '''
+        Fait de version la version live (après vérification), de façon atomique.
+        '''
+        self.verify(version)
+        with self._locked():
+            manifest = self.manifest()
+            previous = manifest["live"]
+            manifest["live"] = version
+            manifest.setdefault("history", []).append({
+                "version": version,
+                "previous": previous,
+                "promoted": datetime.now().isoformat(timespec="seconds"),
+            })
+            self._save_manifest(manifest)
+        print(f"Version live : {previous} -> {version}")
+        return version
+
+    ###---------------Lecture---------------###
+
+    def load(self, version=None, verify=False):
+        '''
+        Charge une version (par défaut la version live) : pipeline.joblib en mmap_mode='r'
+        puis booster UBJSON remis dans le XGBClassifier. Renvoie le pipeline.
+        '''
+        import joblib
+
+        version = version or self.live()
+        if version is None:
+            raise LookupError(f"Aucune version live dans {self.root}")
+        if verify:
+            self.verify(version)
+
+        folder = os.path.join(self.root, version)
+        model = joblib.load(os.path.join(folder, PIPELINE_FILE), mmap_mode="r")
+        model.steps[-1][1].load_model(os.path.join(folder, BOOSTER_FILE))
+        return model
+
+
+###---------------CLI---------------###
+
+def main():
+    parser = argparse.ArgumentParser(description="Registre des modèles Kickstarter")
+    parser.add_argument("command", choices=["list", "show", "promote", "verify"])
+    parser.add_argument("version", nargs="?")
+    parser.add_argument("--root", default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == "list":
+        manifest = registry.manifest()
+        for version, entry in manifest["versions"].items():
+            live = "*" if version == manifest["live"] else " "
+            metrics = ", ".join(f"{k}={v:.4g}" for k, v in entry["metrics"].items() if isinstance(v, (int, float)))
+            print(f"{live} {version}  {entry['created']}  {entry['source'] or '-':<10} "
+                  f"{entry['size'] / 1024:.0f} Ko  {metrics}")
+    elif args.version is None:
+        parser.error(f"{args.command} : version manquante")
+    elif args.command == "show":
+        print(json.dumps(registry.versions()[args.version], indent=2))
+    elif args.command == "promote":
+        registry.promote(args.version)
+    else:
+        registry.verify(args.version)
+        print(f"{args.version} : OK")
+
+
+if __name__ == "__main__":
+    main()
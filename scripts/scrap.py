@@ -3,10 +3,10 @@ from urllib.parse import urlsplit, urlunsplit
 from datetime import datetime, timedelta, timezone
 from datetime import datetime
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 
+from scripts.browser_pool import get_pool
+
 MONTHS = {
     "jan":1,"january":1, "feb":2,"february":2, "mar":3,"march":3, "apr":4,"april":4,
     "may":5, "jun":6,"june":6, "jul":7,"july":7, "aug":8,"august":8,
@@ -54,21 +54,12 @@ def _base_url(url: str) -> str:
     parts[2] = parts[2].rstrip("/")
     return urlunsplit(parts)
 
-def scrape_kickstarter_metadata(url):
-    # Chrome headless (langue forcée en EN, devise UI en $ via ton paramétrage sur le site)
-    opts = Options()
-    opts.add_experimental_option("prefs", {"intl.accept_languages": "en-US,en"})
-    opts.add_argument("--lang=en-US")
-    opts.add_argument("--headless=new")
-    opts.add_argument("--window-size=1366,768")
-    opts.add_argument("--disable-dev-shm-usage"); opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-blink-features=AutomationControlled")
-    opts.add_argument("--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36")
-
-    driver = webdriver.Chrome(options=opts)
-    wait = WebDriverWait(driver, 10)
+def scrape_kickstarter_metadata(url, pool=None):
+    # Chrome headless emprunté au pool (scripts.browser_pool) : pas de nouveau navigateur par URL.
+    # Une erreur pendant la page recycle la session.
+    with (pool or get_pool()).borrow() as driver:
+        wait = WebDriverWait(driver, 10)
 
-    try:
         # Ouvre la page
         driver.get(url)
         wait.until(lambda d: d.execute_script("return document.readyState") == "complete")
@@ -165,10 +156,6 @@ def scrape_kickstarter_metadata(url):
         """)
         deadline_iso, deadline_unix = _parse_deadline(deadline_text or header_text)
 
-    finally:
-        try: driver.quit()
-        except: pass
-
     # LAUNCH DATE + PLEDGED + GOAL fallback via /stats.json
     base = _base_url(url)
     s = requests.Session()
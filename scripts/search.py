@@ -0,0 +1,431 @@
+###---------------Imports---------------###
+
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+
+# Nombre total de threads pour la recherche (par défaut : tous les cœurs)
+N_THREADS = int(os.environ.get("KS_N_THREADS", 0)) or os.cpu_count() or 1
+
+SEARCH_MODES = ("random", "halving")
+
+# Scores par candidat / fold des recherches en cours (reprise après interruption)
+CHECKPOINT_DIR = "save_pkl/checkpoints"
+
+
+###---------------Budget de threads---------------###
+
+def thread_budget(n_tasks, n_threads=None, xgb_threads=None):
+    '''
+    Répartit n_threads entre les fits menés en parallèle (n_jobs de la recherche)
+    et les threads de chaque XGBoost, pour ne jamais dépasser n_threads au total.
+
+    Par défaut XGBoost reçoit 1 thread tant qu'il y a plus de fits (n_tasks =
+    candidats x folds) que de cœurs : paralléliser les fits passe mieux à l'échelle
+    que paralléliser un arbre.
+    Renvoie (search_jobs, xgb_threads).
+    '''
+    n_threads = n_threads or N_THREADS
+    if xgb_threads is None:
+        xgb_threads = max(1, n_threads // max(1, n_tasks))
+    xgb_threads = min(xgb_threads, n_threads)
+    return max(1, n_threads // xgb_threads), xgb_threads
+
+
+###---------------Recherche---------------###
+
+def make_search(pipeline, param_dist, mode="random", n_iter=10, cv=5, scoring="accuracy",
+                n_threads=None, xgb_threads=None, resource="n_samples", max_resources="auto",
+                factor=3, cache_preprocessing=True, checkpoint_dir=None, random_state=42):
+    '''
+    Recherche d'hyperparamètres sur pipeline avec un budget de threads explicite.
+
+    mode='random'  : RandomizedSearchCV, chaque candidat sur chaque fold à taille complète.
+    mode='halving' : HalvingRandomSearchCV, mêmes candidats (même tirage) mais la ressource
+                     (par défaut le nombre de lignes, sinon un paramètre comme
+                     clf__n_estimators) est multipliée par `factor` à chaque tour et seul
+                     le meilleur 1/factor des candidats passe au tour suivant. Le dernier
+                     tour se fait avec toute la ressource.
+
+    cache_preprocessing : les étapes avant clf sont ajustées une seule fois par fold et
+    la recherche ne porte plus que sur clf (voir FoldCachedSearch).
+
+    checkpoint_dir : en mode random, chaque score candidat x fold est écrit dans un
+    checkpoint ; une recherche relancée sur les mêmes données reprend là où elle s'était
+    arrêtée (voir ResumableSearch).
+
+    Le pipeline reçu n'est pas modifié. Les fits de la recherche utilisent xgb_threads
+    threads chacun ; le refit final sur tout X (seul fit à ce moment-là) et le modèle
+    best_estimator_ utilisent tout le budget (clf__n_jobs=n_threads).
+    '''
+    from sklearn.base import clone
+
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode doit être parmi {SEARCH_MODES} (reçu : {mode!r})")
+
+    search_jobs, xgb_threads = thread_budget(n_iter * cv, n_threads, xgb_threads)
+    refit_params = {"clf__n_jobs": n_threads or N_THREADS}
+    pipeline = clone(pipeline).set_params(clf__n_jobs=xgb_threads)
+    print(f"Budget de threads : {search_jobs} fits en parallèle x {xgb_threads} thread(s) XGBoost, "
+          f"refit final sur {refit_params['clf__n_jobs']} thread(s)")
+
+    estimator = pipeline
+    if cache_preprocessing:
+        # Recherche sur le classifieur seul, paramètres sans le préfixe clf__
+        estimator = pipeline.steps[-1][1]
+        param_dist = {k.replace("clf__", "", 1): v for k, v in param_dist.items()}
+        resource = resource.replace("clf__", "", 1)
+
+    if mode == "random" and checkpoint_dir is not None:
+        search = ResumableSearch(estimator, param_dist, n_iter=n_iter, cv=cv, scoring=scoring,
+                                 n_jobs=search_jobs, random_state=random_state,
+                                 checkpoint_dir=checkpoint_dir, refit_params=refit_params)
+    elif mode == "random":
+        from sklearn.model_selection import RandomizedSearchCV
+        search = RandomizedSearchCV(estimator, param_dist, n_iter=n_iter, cv=cv, scoring=scoring,
+                                    n_jobs=search_jobs, random_state=random_state, refit=False)
+    else:
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingRandomSearchCV
+
+        if checkpoint_dir is not None:
+            print("Pas de reprise en mode halving (les tours dépendent des précédents) : pas de checkpoint")
+
+        if resource != "n_samples":
+            # La ressource est fixée par le halving, pas tirée au hasard
+            param_dist = {k: v for k, v in param_dist.items() if k != resource}
+
+        # min_resources='exhaust' : assez de tours pour finir avec ~1 candidat, le dernier
+        # tour avec toute la ressource
+        search = HalvingRandomSearchCV(estimator, param_dist, n_candidates=n_iter, cv=cv, scoring=scoring,
+                                       resource=resource, max_resources=max_resources,
+                                       min_resources="exhaust", factor=factor,
+                                       n_jobs=search_jobs, random_state=random_state, refit=False)
+
+    if cache_preprocessing:
+        return FoldCachedSearch(pipeline, search, refit_params)
+    if isinstance(search, ResumableSearch):
+        return search
+    return BudgetRefitSearch(search, refit_params)
+
+
+def _refit(estimator, best_params, refit_params, X, y):
+    '''
+    Refit du meilleur candidat sur tout X, avec les paramètres du refit (budget de threads).
+    '''
+    from sklearn.base import clone
+
+    return clone(estimator).set_params(**best_params, **refit_params).fit(X, y)
+
+
+class BudgetRefitSearch:
+    '''
+    Recherche sklearn (refit=False) suivie du refit du meilleur candidat avec
+    refit_params (tous les threads) : sklearn referait le fit final avec le n_jobs des fits
+    de la recherche. Les autres attributs (cv_results_...) sont ceux de la recherche.
+    '''
+
+    def __init__(self, search, refit_params):
+        self.search = search
+        self.refit_params = refit_params
+
+    def fit(self, X, y):
+        self.search.fit(X, y)
+        self.best_estimator_ = _refit(self.search.estimator, self.search.best_params_, self.refit_params, X, y)
+        return self
+
+    def __getattr__(self, name):
+        if name == "search":
+            raise AttributeError(name)
+        return getattr(self.search, name)
+
+
+class FoldCachedSearch:
+    '''
+    Recherche dont le preprocessing (toutes les étapes du pipeline avant clf) est ajusté
+    une seule fois par fold : les matrices train / validation de chaque fold sont
+    empilées dans une seule matrice et la recherche sur clf reçoit la liste des
+    découpages correspondants. Chaque candidat ne paie plus que les arbres.
+
+    Mêmes folds, mêmes candidats et mêmes scores que la recherche sur le pipeline
+    complet (en halving sur n_samples, les sous-échantillons peuvent différer de
+    quelques lignes par arrondi) ; best_estimator_ est le pipeline complet réajusté sur tout X
+    (avec refit_params, par exemple clf__n_jobs=tous les threads).
+    '''
+
+    def __init__(self, pipeline, search, refit_params=None):
+        self.pipeline = pipeline
+        self.search = search
+        self.refit_params = refit_params or {}
+
+    def _fold_matrices(self, X, y):
+        from scipy import sparse
+        from sklearn.base import clone
+        from sklearn.model_selection import check_cv
+
+        cv = check_cv(self.search.cv, y, classifier=True)
+        blocks, targets, splits, offset = [], [], [], 0
+        for train, val in cv.split(X, y):
+            preprocessing = clone(self.pipeline[:-1])
+            Z_train = preprocessing.fit_transform(X.iloc[train], y.iloc[train])
+            Z_val = preprocessing.transform(X.iloc[val])
+            blocks += [Z_train, Z_val]
+            targets += [y.iloc[train].to_numpy(), y.iloc[val].to_numpy()]
+            n_train, n_val = Z_train.shape[0], Z_val.shape[0]
+            splits.append((np.arange(offset, offset + n_train),
+                           np.arange(offset + n_train, offset + n_train + n_val)))
+            offset += n_train + n_val
+
+        # Un fold peut avoir moins de colonnes one-hot (catégorie absente) : on complète
+        # à droite par des colonnes vides, train et validation d'un même fold restent alignés
+        width = max(b.shape[1] for b in blocks)
+        if sparse.issparse(blocks[0]):
+            Z = sparse.vstack([sparse.csr_matrix(b, shape=(b.shape[0], width)) for b in blocks]).tocsr()
+        else:
+            Z = np.vstack([np.pad(b, ((0, 0), (0, width - b.shape[1]))) for b in blocks])
+        return Z, np.concatenate(targets), splits
+
+    def fit(self, X, y):
+        start = time.perf_counter()
+        Z, z, splits = self._fold_matrices(X, y)
+        print(f"Preprocessing des {len(splits)} folds : {time.perf_counter() - start:.1f}s "
+              f"(matrice empilée {Z.shape[0]} x {Z.shape[1]})")
+
+        self.search.set_params(cv=splits, refit=False)
+        self.search.fit(Z, z)
+
+        self.cv_results_ = dict(self.search.cv_results_)
+        self.cv_results_["params"] = [{f"clf__{k}": v for k, v in p.items()}
+                                      for p in self.cv_results_["params"]]
+        if getattr(self.search, "resource", None) == "n_samples":
+            # Ressource exprimée en lignes de X, pas de la matrice empilée
+            scale = len(X) / Z.shape[0]
+            self.cv_results_["n_resources"] = [int(round(n * scale)) for n in self.cv_results_["n_resources"]]
+        self.best_params_ = {f"clf__{k}": v for k, v in self.search.best_params_.items()}
+        self.best_score_ = self.search.best_score_
+        self.n_splits_ = self.search.n_splits_
+        self.best_estimator_ = _refit(self.pipeline, self.best_params_, self.refit_params, X, y)
+        if isinstance(self.search, ResumableSearch):
+            self.search.remove_checkpoint()
+        return self
+
+
+###---------------Reprise (checkpoints)---------------###
+
+def _jsonable(params):
+    return {k: v.item() if hasattr(v, "item") else v for k, v in params.items()}
+
+
+def _fingerprint(h, X):
+    from scipy import sparse
+
+    if sparse.issparse(X):
+        X = X.tocsr()
+        for part in (X.data, X.indices, X.indptr):
+            h.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(X, (pd.DataFrame, pd.Series)):
+        h.update(pd.util.hash_pandas_object(X, index=False).to_numpy().tobytes())
+    else:
+        h.update(np.ascontiguousarray(X).tobytes())
+
+
+def _fit_and_score_one(estimator, params, X, y, train, val, scorer, candidate, fold):
+    '''
+    Un fit candidat x fold (exécuté dans un worker joblib) ; renvoie la ligne du checkpoint.
+    '''
+    from sklearn.base import clone
+    from sklearn.utils import _safe_indexing
+
+    start = time.perf_counter()
+    model = clone(estimator).set_params(**params)
+    model.fit(_safe_indexing(X, train), _safe_indexing(y, train))
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score = scorer(model, _safe_indexing(X, val), _safe_indexing(y, val))
+    score_time = time.perf_counter() - start
+
+    return {"candidate": candidate, "fold": fold, "params": _jsonable(params),
+            "score": float(score), "fit_time": fit_time, "score_time": score_time}
+
+
+class ResumableSearch:
+    '''
+    Recherche aléatoire (mêmes candidats, mêmes folds et mêmes scores que
+    RandomizedSearchCV) dont chaque fit candidat x fold terminé est ajouté, avec ses
+    paramètres et son score, à un checkpoint JSON lines dans checkpoint_dir.
+
+    Le nom du checkpoint dépend des données, des folds, de l'espace de recherche et de
+    l'estimateur : une recherche relancée après une interruption (OOM, préemption)
+    relit ce qui est déjà fait, ne lance que les fits manquants, puis choisit le
+    meilleur candidat sur l'ensemble des résultats.
+
+    refit_params : paramètres ajoutés pour le refit final (ex. clf__n_jobs=tous les threads).
+
+    Le checkpoint est supprimé une fois la recherche terminée et le refit réussi (avec
+    refit=False, c'est à l'appelant de le faire après son refit : remove_checkpoint) ;
+    keep_checkpoint=True pour le garder.
+    '''
+
+    def __init__(self, estimator, param_dist, n_iter=10, cv=5, scoring="accuracy", n_jobs=1,
+                 random_state=42, checkpoint_dir=CHECKPOINT_DIR, refit=True, refit_params=None,
+                 keep_checkpoint=False):
+        self.estimator = estimator
+        self.param_dist = param_dist
+        self.n_iter = n_iter
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.checkpoint_dir = checkpoint_dir
+        self.refit = refit
+        self.refit_params = refit_params or {}
+        self.keep_checkpoint = keep_checkpoint
+
+    def set_params(self, **params):
+        for key, value in params.items():
+            setattr(self, key, value)
+        return self
+
+    def checkpoint_path(self, X, y, splits):
+        h = hashlib.sha1()
+        _fingerprint(h, X)
+        _fingerprint(h, np.asarray(y))
+        for _, val in splits:
+            h.update(np.asarray(val, dtype=np.int64).tobytes())
+        # n_jobs ne change pas les résultats : un autre budget de threads reprend le même checkpoint
+        estimator_params = sorted((k, repr(v)) for k, v in self.estimator.get_params().items()
+                                  if not k.endswith("n_jobs"))
+        h.update(repr((estimator_params, sorted(self.param_dist.items()), self.n_iter,
+                       self.random_state, self.scoring)).encode())
+        return os.path.join(self.checkpoint_dir, f"search-{h.hexdigest()[:16]}.jsonl")
+
+    def _load(self, path, candidates):
+        done = {}
+        if not os.path.exists(path):
+            return done
+
+        # Une ligne tronquée par l'interruption est retirée : les ajouts repartent d'une ligne propre
+        with open(path, "rb+") as f:
+            content = f.read()
+            f.truncate(content.rfind(b"\n") + 1)
+
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                i = record["candidate"]
+                if i < len(candidates) and record["params"] == _jsonable(candidates[i]):
+                    done[(i, record["fold"])] = record
+        return done
+
+    def fit(self, X, y):
+        from joblib import Parallel, delayed
+        from sklearn.metrics import check_scoring
+        from sklearn.model_selection import ParameterSampler, check_cv
+
+        splits = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        candidates = list(ParameterSampler(self.param_dist, self.n_iter, random_state=self.random_state))
+        scorer = check_scoring(self.estimator, scoring=self.scoring)
+
+        path = self.checkpoint_path_ = self.checkpoint_path(X, y, splits)
+        done = self._load(path, candidates)
+        todo = [(i, k) for i in range(len(candidates)) for k in range(len(splits)) if (i, k) not in done]
+        print(f"Checkpoint {path} : {len(done)} fits déjà faits, {len(todo)} à faire")
+
+        if todo:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            tasks = (delayed(_fit_and_score_one)(self.estimator, candidates[i], X, y, *splits[k],
+                                                 scorer, i, k) for i, k in todo)
+            with open(path, "a") as f:
+                # Chaque résultat est écrit (et synchronisé sur disque) dès qu'il arrive
+                for record in Parallel(n_jobs=self.n_jobs, return_as="generator_unordered")(tasks):
+                    f.write(json.dumps(record) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                    done[(record["candidate"], record["fold"])] = record
+
+        self._set_results(candidates, len(splits), done)
+        if self.refit:
+            self.best_estimator_ = _refit(self.estimator, self.best_params_, self.refit_params, X, y)
+            self.remove_checkpoint()
+        return self
+
+    def remove_checkpoint(self):
+        '''
+        Supprime le checkpoint de la dernière recherche (terminée) : un fichier par
+        signature de recherche, ils s'accumuleraient sinon dans checkpoint_dir.
+        '''
+        path = getattr(self, "checkpoint_path_", None)
+        if self.keep_checkpoint or path is None or not os.path.exists(path):
+            return
+        os.remove(path)
+        print(f"Checkpoint {path} supprimé (recherche terminée)")
+
+    def _set_results(self, candidates, n_splits, done):
+        from scipy.stats import rankdata
+
+        def table(key):
+            return np.array([[done[(i, k)][key] for k in range(n_splits)] for i in range(len(candidates))])
+
+        scores, fit_times, score_times = table("score"), table("fit_time"), table("score_time")
+        results = {
+            "params": candidates,
+            "mean_fit_time": fit_times.mean(axis=1),
+            "std_fit_time": fit_times.std(axis=1),
+            "mean_score_time": score_times.mean(axis=1),
+            "std_score_time": score_times.std(axis=1),
+        }
+        for k in range(n_splits):
+            results[f"split{k}_test_score"] = scores[:, k]
+        results["mean_test_score"] = scores.mean(axis=1)
+        results["std_test_score"] = scores.std(axis=1)
+        results["rank_test_score"] = rankdata(-results["mean_test_score"], method="min").astype(np.int32)
+
+        self.cv_results_ = results
+        self.n_splits_ = n_splits
+        self.best_index_ = int(np.argmax(results["mean_test_score"]))
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(results["mean_test_score"][self.best_index_])
+
+
+def run_search(search, X, y):
+    '''
+    fit de la recherche, chronométré ; affiche le rapport par candidat.
+    '''
+    start = time.perf_counter()
+    search.fit(X, y)
+    wall = time.perf_counter() - start
+
+    report = search_report(search)
+    with pd.option_context("display.max_colwidth", 80, "display.width", 200):
+        print(report.to_string(index=False))
+    print(f"Recherche terminée en {wall:.1f}s ({len(report)} fits candidat x tour), "
+          f"meilleur score : {search.best_score_:.4f}")
+    return search
+
+
+def search_report(search):
+    '''
+    Une ligne par candidat (et par tour pour le halving) : paramètres, ressource,
+    temps de fit cumulé sur les folds, score moyen. Trié par score décroissant.
+    '''
+    results = search.cv_results_
+    n_splits = search.n_splits_
+    report = pd.DataFrame({
+        "iter": results.get("iter", [0] * len(results["params"])),
+        "n_resources": results.get("n_resources", [None] * len(results["params"])),
+        "params": [{k.replace("clf__", ""): v for k, v in p.items()} for p in results["params"]],
+        "fit_time_s": (results["mean_fit_time"] * n_splits).round(2),
+        "score_time_s": (results["mean_score_time"] * n_splits).round(2),
+        "mean_score": results["mean_test_score"].round(4),
+        "std_score": results["std_test_score"].round(4),
+    })
+    return report.sort_values(["iter", "mean_score"], ascending=[False, False]).reset_index(drop=True)
@@ -0,0 +1,133 @@
+'''
+Mise à jour incrémentale du modèle avec des projets terminés récemment, sans
+nouvelle recherche d'hyperparamètres :
+
+    python -m scripts.update new_projects.csv --promote
+    python -m scripts.update new_projects.csv --model save_pkl/model_pkl/kickstarter_model.pkl --rounds 50
+    python -m scripts.update new_projects.csv --eval-fraction 0.2     # comparaison ancien / nouveau
+'''
+
+###---------------Imports---------------###
+
+import argparse
+import copy
+import os
+import time
+
+import numpy as np
+
+from scripts.artifacts import MODEL_PATH, is_self_contained
+from scripts.ingestion import load_projects
+from scripts.preprocessing import _filter_projects
+from scripts.registry import REGISTRY_DIR, ModelRegistry
+
+
+###---------------Mise à jour---------------###
+
+def update_model(model, new_projects, n_rounds=50, eval_fraction=0, random_state=42):
+    '''
+    Renvoie (nouveau pipeline, rapport) à partir du pipeline actuel et de projets bruts
+    (format ks-projects) :
+
+    - les moyennes d'objectif (goal_ratio) sont mises à jour avec les nouvelles lignes,
+    - le booster XGBoost existant est prolongé de n_rounds arbres sur le nouveau lot,
+    - le ColumnTransformer reste figé (une nouvelle modalité est ignorée, comme en prédiction).
+
+    eval_fraction : par défaut 0, tout le lot sert à la mise à jour. Sinon, part du lot
+    gardée de côté pour comparer l'ancien et le nouveau modèle : ces lignes-là ne sont
+    pas apprises (comparaison à lancer à part, avant la mise à jour enregistrée).
+    '''
+    from sklearn.base import clone
+    from sklearn.metrics import accuracy_score, log_loss
+    from sklearn.model_selection import train_test_split
+
+    if not is_self_contained(model):
+        raise ValueError("Le modèle ne contient pas l'étape goal_ratio : mise à jour incrémentale impossible, "
+                         "réentraîner avec model_training_saving")
+
+    df = _filter_projects(new_projects)
+    df = df[df['state'].isin(['failed', 'successful'])]
+    if df.empty:
+        raise ValueError("Aucun nouveau projet terminé (successful / failed) dans le lot")
+    y = (df['state'] == 'successful').astype(int)
+    X = df.drop(columns=['state'])
+
+    X_eval = y_eval = None
+    if eval_fraction and len(df) >= 50 and y.nunique() == 2:
+        X, X_eval, y, y_eval = train_test_split(X, y, test_size=eval_fraction, stratify=y,
+                                                random_state=random_state)
+
+    start = time.perf_counter()
+    updated = copy.deepcopy(model)
+    updated.named_steps['goal_ratio'].partial_fit(X)
+
+    # On repart du booster actuel : n_rounds arbres de plus, mêmes hyperparamètres
+    clf = model.named_steps['clf']
+    new_clf = clone(clf).set_params(n_estimators=n_rounds)
+    new_clf.fit(updated[:-1].transform(X), y, xgb_model=clf.get_booster())
+    updated.set_params(clf=new_clf)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        'rows': len(X),
+        'rounds_before': clf.get_booster().num_boosted_rounds(),
+        'rounds_after': new_clf.get_booster().num_boosted_rounds(),
+        'update_s': round(elapsed, 2),
+    }
+    if X_eval is not None:
+        for key, pipeline in (('before', model), ('after', updated)):
+            proba = pipeline.predict_proba(X_eval)[:, 1]
+            report[f'accuracy_{key}'] = round(accuracy_score(y_eval, proba > 0.5), 4)
+            report[f'logloss_{key}'] = round(log_loss(y_eval, np.clip(proba, 1e-7, 1 - 1e-7)), 4)
+
+    print(f"Mise à jour : {report['rows']} projets, {report['rounds_before']} -> "
+          f"{report['rounds_after']} arbres en {report['update_s']}s")
+    if X_eval is not None:
+        print(f"Sur {len(X_eval)} projets de côté : accuracy {report['accuracy_before']} -> "
+              f"{report['accuracy_after']}, logloss {report['logloss_before']} -> {report['logloss_after']}")
+    return updated, report
+
+
+def update_and_save(data_path, model_path=None, registry_dir=REGISTRY_DIR, promote=False, **kwargs):
+    '''
+    Charge le modèle actuel (version live du registre, sinon model_path / MODEL_PATH),
+    le met à jour avec le CSV de nouveaux projets et l'enregistre comme nouvelle version
+    du registre. Renvoie le nom de la version.
+    '''
+    registry = ModelRegistry(registry_dir)
+    parent = None
+    if model_path is None and registry.live() is not None:
+        parent = registry.live()
+        model = registry.load(parent)
+    else:
+        import joblib
+        model = joblib.load(model_path or MODEL_PATH)
+
+    new_projects = load_projects(data_path)
+    updated, report = update_model(model, new_projects, **kwargs)
+
+    params = {k: v for k, v in updated.named_steps['clf'].get_params().items()
+              if k in ('n_estimators', 'max_depth', 'learning_rate', 'subsample', 'colsample_bytree')}
+    params['n_rounds_total'] = report['rounds_after']
+    return registry.register(updated, params=params, metrics=report, source=f'update:{os.path.basename(data_path)}',
+                             parent=parent, promote=promote)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mise à jour incrémentale du modèle Kickstarter")
+    parser.add_argument("data_path", help="CSV de nouveaux projets au format ks-projects-201801.csv")
+    parser.add_argument("--model", default=None, help="pipeline actuel (.pkl) ; par défaut la version live du registre")
+    parser.add_argument("--registry-dir", default=REGISTRY_DIR)
+    parser.add_argument("--promote", action="store_true", help="la nouvelle version devient la version live")
+    parser.add_argument("--rounds", type=int, default=50, help="nombre d'arbres ajoutés")
+    parser.add_argument("--eval-fraction", type=float, default=0,
+                        help="part du lot gardée de côté pour comparer ancien / nouveau modèle "
+                             "(ces lignes ne sont pas apprises ; défaut : 0, tout le lot est appris)")
+    args = parser.parse_args()
+
+    update_and_save(args.data_path, model_path=args.model, registry_dir=args.registry_dir, promote=args.promote,
+                    n_rounds=args.rounds, eval_fraction=args.eval_fraction)
+
+
+if __name__ == "__main__":
+    main()